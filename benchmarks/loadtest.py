@@ -0,0 +1,209 @@
+"""
+HTTP load test and latency benchmark.
+
+Replays the weighted route mix from ``benchmarks.routes`` against a running
+server and reports p50/p95/p99 latency, RPS and per-route SQL query counts.
+Results can be stored as a baseline and later runs are diffed against it.
+
+Usage (inside the benchmark stack, see ``benchmarks/docker-compose.yaml``):
+
+    python -m benchmarks.loadtest --base-url http://web:8000 -c 16 -n 2000
+    python -m benchmarks.loadtest --save-baseline benchmarks/baselines/main.json
+    python -m benchmarks.loadtest --baseline benchmarks/baselines/main.json --max-regression 10
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.routes import ROUTES, weighted_plan, load_aliases
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def fetch(base_url, name, path, timeout):
+    started = time.perf_counter()
+    status = 0
+    try:
+        with urllib.request.urlopen(base_url + path, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return name, status, time.perf_counter() - started
+
+
+def run_load(base_url, plan, concurrency, timeout, warmup=0):
+    for name, path in plan[:warmup]:
+        fetch(base_url, name, path, timeout)
+    plan = plan[warmup:]
+
+    samples = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(fetch, base_url, name, path, timeout) for name, path in plan]
+        for future in futures:
+            samples.append(future.result())
+    elapsed = time.perf_counter() - started
+    return samples, elapsed
+
+
+def count_queries(aliases):
+    """Run every route once in-process and count the SQL queries it issues."""
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from benchmarks.routes import build_url
+
+    client = Client()
+    counts = {}
+    for name, template, _ in ROUTES:
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(build_url(template, aliases))
+        counts[name] = len(ctx.captured_queries)
+    return counts
+
+
+def summarize(samples, elapsed, query_counts=None):
+    by_route = defaultdict(list)
+    errors = defaultdict(int)
+    for name, status, duration in samples:
+        by_route[name].append(duration)
+        if status == 0 or status >= 500:
+            errors[name] += 1
+
+    def stats(durations, seconds):
+        durations = sorted(durations)
+        return {
+            'count': len(durations),
+            'p50': round(percentile(durations, 50) * 1000, 2),
+            'p95': round(percentile(durations, 95) * 1000, 2),
+            'p99': round(percentile(durations, 99) * 1000, 2),
+            'rps': round(len(durations) / seconds, 2) if seconds else 0.0,
+        }
+
+    routes = {}
+    for name, durations in sorted(by_route.items()):
+        routes[name] = stats(durations, elapsed)
+        routes[name]['errors'] = errors[name]
+        if query_counts is not None:
+            routes[name]['queries'] = query_counts.get(name)
+
+    total = stats([duration for _, _, duration in samples], elapsed)
+    total['errors'] = sum(errors.values())
+    return {'total': total, 'routes': routes}
+
+
+def _delta(current, previous):
+    if not previous:
+        return ''
+    return f'{(current - previous) / previous * 100:+.1f}%'
+
+
+def print_report(result, baseline=None):
+    baseline_routes = (baseline or {}).get('routes', {})
+    header = f"{'route':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>9}{'err':>6}{'sql':>6}"
+    if baseline:
+        header += f"{'Δp50':>9}{'Δp95':>9}{'Δp99':>9}{'Δsql':>7}"
+    print(header)
+    print('-' * len(header))
+
+    rows = list(result['routes'].items()) + [('TOTAL', result['total'])]
+    for name, row in rows:
+        line = (f"{name:<16}{row['count']:>7}{row['p50']:>10}{row['p95']:>10}{row['p99']:>10}"
+                f"{row['rps']:>9}{row['errors']:>6}{str(row.get('queries', '')):>6}")
+        if baseline:
+            old = baseline['total'] if name == 'TOTAL' else baseline_routes.get(name, {})
+            sql_delta = ''
+            if row.get('queries') is not None and old.get('queries') is not None:
+                sql_delta = f"{row['queries'] - old['queries']:+d}"
+            line += (f"{_delta(row['p50'], old.get('p50')):>9}{_delta(row['p95'], old.get('p95')):>9}"
+                     f"{_delta(row['p99'], old.get('p99')):>9}{sql_delta:>7}")
+        print(line)
+
+
+def regressions(result, baseline, max_regression):
+    """Routes whose p95 grew by more than ``max_regression`` percent."""
+    failed = []
+    for name, row in result['routes'].items():
+        old = baseline.get('routes', {}).get(name)
+        if old and old.get('p95') and (row['p95'] - old['p95']) / old['p95'] * 100 > max_regression:
+            failed.append(name)
+    return failed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Replay the weighted route mix and report latency.')
+    parser.add_argument('--base-url', default=os.getenv('BENCH_BASE_URL', 'http://127.0.0.1:8000'))
+    parser.add_argument('-c', '--concurrency', type=int, default=8)
+    parser.add_argument('-n', '--requests', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-queries', action='store_true', help='skip the in-process SQL query count')
+    parser.add_argument('--baseline', help='JSON file to diff the results against')
+    parser.add_argument('--save-baseline', help='write the results to this JSON file')
+    parser.add_argument('--max-regression', type=float,
+                        help='exit with status 1 if any route p95 regresses by more than this percent')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_django()
+
+    aliases = load_aliases()
+    plan = weighted_plan(args.requests + args.warmup, aliases, seed=args.seed)
+    samples, elapsed = run_load(args.base_url.rstrip('/'), plan, args.concurrency, args.timeout,
+                                warmup=args.warmup)
+    query_counts = None if args.no_queries else count_queries(aliases)
+
+    result = summarize(samples, elapsed, query_counts)
+    result['meta'] = {
+        'base_url': args.base_url,
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'seed': args.seed,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_report(result, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+    if baseline and args.max_regression is not None:
+        failed = regressions(result, baseline, args.max_regression)
+        if failed:
+            print(f"p95 regression above {args.max_regression}%: {', '.join(failed)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
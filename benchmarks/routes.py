@@ -0,0 +1,50 @@
+"""
+Weighted route mix replayed by the load test.
+
+Weights roughly follow the production access log: the index and news pages
+dominate, search and the listing pages come next, AMP and the sitemap are
+hit mostly by crawlers.
+"""
+import random
+
+ROUTES = [
+    # (name, url template, weight)
+    ('index', '/', 30),
+    ('all_news', '/news/', 15),
+    ('news_detail', '/news/{alias}/', 20),
+    ('search_results', '/search_results/?search={search}', 8),
+    ('laws', '/laws/', 8),
+    ('event_calendar', '/event_calendar/', 6),
+    ('amp', '/amp/{alias}/', 5),
+    ('sitemap', '/sitemap.xml', 3),
+    ('forum', '/forum/', 5),
+]
+
+SEARCH_TERMS = ['охрана', 'труд', 'безопасность', 'инструктаж', 'СИЗ', 'риск']
+
+
+def load_aliases(limit=50):
+    """Pick real article aliases so the detail routes do not 404."""
+    from news.models import Article
+
+    return list(
+        Article.objects.exclude(alias__isnull=True).exclude(alias='')
+        .values_list('alias', flat=True)[:limit]
+    )
+
+
+def build_url(template, aliases, rng=random):
+    return template.format(
+        alias=rng.choice(aliases) if aliases else 'missing',
+        search=rng.choice(SEARCH_TERMS),
+    )
+
+
+def weighted_plan(total, aliases, routes=ROUTES, seed=None):
+    """Return ``total`` (name, path) pairs drawn from the weighted mix."""
+    rng = random.Random(seed)
+    names = [name for name, _, _ in routes]
+    templates = {name: template for name, template, _ in routes}
+    weights = [weight for _, _, weight in routes]
+    picks = rng.choices(names, weights=weights, k=total)
+    return [(name, build_url(templates[name], aliases, rng)) for name in picks]
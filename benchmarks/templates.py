@@ -0,0 +1,83 @@
+"""
+Template render time per page, with and without the cached loader.
+
+Every route from ``benchmarks.routes`` is requested in-process through the
+test client, first with plain loaders (each render re-reads and re-parses
+the templates, as before) and then with the cached loader after prewarming.
+Times include the view and its queries, so the difference between the two
+columns is what parsing costs per request.
+
+Usage:
+
+    python -m benchmarks.templates -n 20
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from benchmarks.loadtest import setup_django
+from benchmarks.routes import ROUTES, build_url, load_aliases
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--repeat', type=int, default=20, help='renders per page and configuration')
+    return parser.parse_args(argv)
+
+
+def templates_setting(cached):
+    from django.conf import settings
+
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    template = dict(settings.TEMPLATES[0])
+    template['OPTIONS'] = dict(template['OPTIONS'], loaders=loaders)
+    return [template]
+
+
+def measure(paths, repeat):
+    from django.test import Client
+
+    client = Client()
+    timings = {}
+    for name, path in paths:
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(path)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            samples.append(time.perf_counter() - started)
+        timings[name] = statistics.median(samples) * 1000
+    return timings
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_django()
+    from django.test.utils import override_settings
+    from config.templates import prewarm_templates
+
+    aliases = load_aliases()
+    paths = [(name, build_url(template, aliases)) for name, template, _ in ROUTES]
+
+    with override_settings(TEMPLATES=templates_setting(cached=False), ALLOWED_HOSTS=['*']):
+        before = measure(paths, args.repeat)
+    with override_settings(TEMPLATES=templates_setting(cached=True), ALLOWED_HOSTS=['*']):
+        prewarm_templates()
+        after = measure(paths, args.repeat)
+
+    print(f"{'route':<16}{'uncached ms':>12}{'cached ms':>12}{'saved':>9}")
+    for name, _ in paths:
+        saved = (before[name] - after[name]) / before[name] * 100 if before[name] else 0.0
+        print(f"{name:<16}{before[name]:>12.1f}{after[name]:>12.1f}{saved:>8.1f}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Shared base for the admin classes of all apps.
+
+The changelist of a large table spends most of its time counting: an exact
+``COUNT(*)`` for the paginator and another one for "N total" next to the
+search box. ``EstimatedCountPaginator`` takes the row count of an
+unfiltered changelist from the planner statistics (``pg_class.reltuples``,
+kept current by autovacuum) once the table is past ``ESTIMATE_THRESHOLD``
+rows; filtered and searched lists, small tables and other databases still
+count exactly. ``BaseAdmin`` uses it and drops the second count.
+"""
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+# Below this the exact count is cheap and the estimate may be stale.
+ESTIMATE_THRESHOLD = 10000
+
+
+def estimated_count(queryset):
+    """Planner estimate of the rows of an unfiltered ``queryset``, or None."""
+    query = queryset.query
+    if query.where or query.distinct or query.combinator or query.is_sliced:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                       [connection.ops.quote_name(queryset.model._meta.db_table)])
+        row = cursor.fetchone()
+    # -1: the table has never been analyzed.
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class BaseAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # "N total" beside the search box is one more COUNT(*) per page view.
+    show_full_result_count = False
@@ -13,4 +13,21 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.TEMPLATES_PREWARM:
+    from config.templates import prewarm_templates
+
+    prewarm_templates()
+
+# Imported after Django is set up.
+from forum.stream import STREAM_PATH, messages_stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # The forum chat stream is served outside Django, see forum/stream.py.
+    if settings.FORUM_STREAM and scope['type'] == 'http' and scope['path'] == STREAM_PATH:
+        return await messages_stream(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,80 @@
+"""
+Primary/replica routing for the read-only public pages.
+
+Reads go to a random replica from ``settings.DATABASE_REPLICAS`` and every
+write goes to ``default``. To hide replica lag from the person who just
+wrote something (a comment, a question, a forum message),
+``ReplicaPinMiddleware`` routes the whole request to the primary for
+unsafe methods and, when such a request wrote to the database, sets a short
+lived cookie that keeps the client's reads on the primary for
+``settings.REPLICA_PIN_SECONDS``.
+
+Writes made while serving a GET (view counters) do not pin the client.
+Streaming responses are rendered after the middleware returns; they carry
+the request's pin with ``is_pinned``/``pinned`` (see news/streaming.py).
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PIN_COOKIE = 'db_primary'
+
+_pinned = ContextVar('db_pinned_to_primary', default=False)
+_wrote = ContextVar('db_wrote', default=False)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@contextmanager
+def pinned(value):
+    """Route reads as a request with the pin ``value`` would."""
+    token = _pinned.set(value)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or _pinned.get():
+            return 'default'
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaPinMiddleware:
+    safe_methods = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        unsafe = request.method not in self.safe_methods
+        pinned = _pinned.set(unsafe or request.COOKIES.get(PIN_COOKIE) == '1')
+        wrote = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if unsafe and _wrote.get():
+                response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                    httponly=True, samesite='Lax')
+        finally:
+            _pinned.reset(pinned)
+            _wrote.reset(wrote)
+        return response
@@ -0,0 +1,68 @@
+"""
+Gunicorn config for production.
+
+    gunicorn -c config/gunicorn.py config.wsgi:application
+
+ASGI mode (async views for index, search and the event calendar):
+
+    ASYNC_VIEWS=True GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker \
+        gunicorn -c config/gunicorn.py config.asgi:application
+
+Every setting can be overridden from the environment (see the ``GUNICORN_*``
+variables below), so the same file is used in docker-compose and in the
+benchmark stack.
+"""
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Worker model. ``gthread`` keeps one slow request (search, big listings) from
+# blocking the whole worker; ``sync`` is still available for debugging and
+# ``uvicorn.workers.UvicornWorker`` serves the ASGI app.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = env_int('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+threads = env_int('GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1)
+
+# Load the Django app once in the master and fork workers from it, so the
+# imported code and templates are shared copy-on-write.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+# Recycle workers periodically to cap memory growth; jitter keeps them from
+# restarting all at once.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# Worker-level stats (requests, durations, status codes, busy workers) are
+# pushed to statsd when a host is configured.
+statsd_host = os.getenv('GUNICORN_STATSD_HOST') or None
+statsd_prefix = os.getenv('GUNICORN_STATSD_PREFIX', 'imaq.gunicorn')
+
+proc_name = 'imaq'
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+access_log_format = '%(h)s "%(r)s" %(s)s %(b)s %(L)ss pid=%(p)s'
+
+
+def post_fork(server, worker):
+    # Connections opened by the master while preloading must not be shared
+    # between forked workers.
+    from django.db import connections
+    for conn in connections.all():
+        conn.close()
+    server.log.info('Worker spawned (pid: %s)', worker.pid)
+
+
+def worker_exit(server, worker):
+    server.log.info('Worker exited (pid: %s, handled: %s)', worker.pid, getattr(worker, 'nr', 0))
@@ -0,0 +1,180 @@
+"""
+HTML minification for ``settings.COMPRESS_HTML``.
+
+Whitespace runs are collapsed to one space (or one newline when the run
+spans lines) and comments are dropped, except conditional comments. Inside
+a tag only the whitespace between attributes is collapsed; quoted attribute
+values (form values, ``title``, ``data-*``, ``on*`` handlers) are kept. The
+content of ``<pre>``, ``<script>``, ``<style>``, ``<textarea>`` and
+``<trix-editor>`` is left untouched; Trix output rendered with ``|safe``
+keeps its formatting because only ``<pre>`` blocks are whitespace-sensitive
+there.
+
+Compression happens later, in nginx (or in ``GZipMiddleware`` when it is
+enabled, which then wraps this middleware). Streaming responses are minified
+chunk by chunk; a chunk is held back only while a tag, a comment or a
+protected block is still open. The bytes saved are logged at INFO for every
+response, streamed or not, and sent in ``X-Html-Minify-Saved`` when the body
+is complete.
+
+Bodies are not memoized: anonymous pages are stored by the nginx
+micro-cache after minification, so the same body rarely reaches Django
+twice, and other pages differ per user.
+"""
+import codecs
+import logging
+import re
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SAVED_HEADER = 'X-Html-Minify-Saved'
+
+PROTECTED_TAGS = ('pre', 'script', 'style', 'textarea', 'trix-editor')
+
+_open = re.compile(r'<!--|<(%s)\b' % '|'.join(PROTECTED_TAGS), re.IGNORECASE)
+_comment = re.compile(r'<!--.*?-->', re.DOTALL)
+_protected = {
+    tag: re.compile(r'<%s\b.*?</%s\s*>' % (tag, tag), re.IGNORECASE | re.DOTALL) for tag in PROTECTED_TAGS
+}
+_whitespace = re.compile(r'\s{2,}|[\t\r\n]')
+# Attribute values may contain ">".
+_TAG_BODY = r'''(?:[^<>"']|"[^"]*"|'[^']*')*'''
+_tag = re.compile(r'<[A-Za-z/!?]' + _TAG_BODY + '>')
+_tag_whitespace = re.compile(r'''("[^"]*"|'[^']*')|\s+''')
+# An unfinished tag or a whitespace run at the end of a chunk may continue
+# in the next one.
+_partial_tail = re.compile(r'''<(?:[A-Za-z/!?]''' + _TAG_BODY + r'''(?:"[^"]*|'[^']*)?)?$|\s+$''')
+
+
+def _collapse(match):
+    return '\n' if '\n' in match.group() else ' '
+
+
+def _collapse_outside_quotes(match):
+    return match.group(1) or _collapse(match)
+
+
+def _minify_text(text):
+    out = []
+    pos = 0
+    for tag in _tag.finditer(text):
+        out.append(_whitespace.sub(_collapse, text[pos:tag.start()]))
+        out.append(_tag_whitespace.sub(_collapse_outside_quotes, tag.group()))
+        pos = tag.end()
+    out.append(_whitespace.sub(_collapse, text[pos:]))
+    return ''.join(out)
+
+
+def _minify(text):
+    """Minify ``text`` and return ``(minified, rest)``; ``rest`` is an unfinished block."""
+    out = []
+    pos = 0
+    while True:
+        start = _open.search(text, pos)
+        if start is None:
+            tail = text[pos:]
+            partial = _partial_tail.search(tail)
+            cut = partial.start() if partial else len(tail)
+            out.append(_minify_text(tail[:cut]))
+            return ''.join(out), tail[cut:]
+        out.append(_minify_text(text[pos:start.start()]))
+        tag = start.group(1)
+        pattern = _protected[tag.lower()] if tag else _comment
+        block = pattern.match(text, start.start())
+        if block is None:
+            return ''.join(out), text[start.start():]
+        if tag or block.group().startswith('<!--[if'):
+            out.append(block.group())
+        pos = block.end()
+
+
+def minify_html(text):
+    minified, rest = _minify(text)
+    return minified + rest
+
+
+def minify_content(content, charset='utf-8'):
+    return minify_html(content.decode(charset)).encode(charset)
+
+
+class StreamMinifier:
+    def __init__(self, charset='utf-8'):
+        self.charset = charset
+        self.decoder = codecs.getincrementaldecoder(charset)()
+        self.buffer = ''
+        self.received = 0
+        self.sent = 0
+
+    def feed(self, chunk):
+        if isinstance(chunk, str):
+            chunk = chunk.encode(self.charset)
+        self.received += len(chunk)
+        minified, self.buffer = _minify(self.buffer + self.decoder.decode(chunk))
+        return self._out(minified)
+
+    def close(self):
+        minified, self.buffer = minify_html(self.buffer + self.decoder.decode(b'', final=True)), ''
+        return self._out(minified)
+
+    def _out(self, text):
+        data = text.encode(self.charset)
+        self.sent += len(data)
+        return data
+
+
+def _log_saved(path, original, minified):
+    logger.info('%s: minified %d -> %d bytes, %d saved', path, original, minified, original - minified)
+
+
+def _minified_stream(content, minifier, path):
+    for chunk in content:
+        data = minifier.feed(chunk)
+        if data:
+            yield data
+    data = minifier.close()
+    if data:
+        yield data
+    _log_saved(path, minifier.received, minifier.sent)
+
+
+async def _minified_astream(content, minifier, path):
+    async for chunk in content:
+        data = minifier.feed(chunk)
+        if data:
+            yield data
+    data = minifier.close()
+    if data:
+        yield data
+    _log_saved(path, minifier.received, minifier.sent)
+
+
+class HtmlMinifyMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not settings.COMPRESS_HTML
+            or not response.get('Content-Type', '').startswith('text/html')
+            or response.has_header('Content-Encoding')
+        ):
+            return response
+
+        if response.streaming:
+            minifier = StreamMinifier(response.charset)
+            if getattr(response, 'is_async', False):
+                response.streaming_content = _minified_astream(response.streaming_content, minifier, request.path)
+            else:
+                response.streaming_content = _minified_stream(response.streaming_content, minifier, request.path)
+            return response
+
+        original = len(response.content)
+        response.content = minify_content(response.content, response.charset)
+        response[SAVED_HEADER] = str(original - len(response.content))
+        _log_saved(request.path, original, len(response.content))
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+        return response
@@ -0,0 +1,73 @@
+"""
+nginx micro-cache support (see ``nginx/default.conf``).
+
+``MicroCacheMiddleware`` opts a response into the nginx cache with
+``X-Accel-Expires`` only when it is the same for every anonymous visitor:
+a GET without a session, answered without setting any cookie. Pages for
+anonymous visitors therefore carry no CSRF token; their forms fetch one
+from ``/csrf/`` on submit (news/templatetags/lazy_csrf.py). nginx never
+caches anything Django did not opt in.
+
+``refresh_paths`` keeps cached pages current after content changes. nginx
+OSS has no purge command, so the paths are requested on the internal
+listener at ``settings.NGINX_CACHE_REFRESH_URL``, which bypasses the cache
+and stores the fresh page under the same key. Requests run on a background
+thread after commit and failures are only logged: the entry expires within
+``MICROCACHE_SECONDS`` anyway.
+"""
+import logging
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CACHEABLE_STATUSES = (200, 301, 302, 404)
+REFRESH_TIMEOUT = 10
+
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='microcache-refresh')
+
+
+class MicroCacheMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Listed before SessionMiddleware, so every cookie the response will
+        # set is visible here.
+        response = self.get_response(request)
+        if (
+            settings.MICROCACHE_SECONDS
+            and request.method in ('GET', 'HEAD')
+            and response.status_code in CACHEABLE_STATUSES
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and not getattr(getattr(request, 'user', None), 'is_authenticated', False)
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', '')
+            and 'no-cache' not in response.get('Cache-Control', '')
+        ):
+            response['X-Accel-Expires'] = str(settings.MICROCACHE_SECONDS)
+        return response
+
+
+def _refresh(path):
+    try:
+        with urllib.request.urlopen(settings.NGINX_CACHE_REFRESH_URL + path, timeout=REFRESH_TIMEOUT) as response:
+            response.read()
+    except Exception as e:
+        logger.warning('Micro-cache refresh of %s failed: %s', path, e)
+
+
+def refresh_paths(paths):
+    """Refresh the cached copies of ``paths`` once the current transaction commits."""
+    if not settings.NGINX_CACHE_REFRESH_URL:
+        return
+    paths = sorted(set(paths))
+
+    def submit():
+        for path in paths:
+            _refresh_executor.submit(_refresh, path)
+
+    transaction.on_commit(submit)
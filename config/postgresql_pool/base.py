@@ -0,0 +1,87 @@
+"""
+PostgreSQL backend with a psycopg 3 connection pool.
+
+Django 4.2 has no built-in pooling, so this backend hands out connections
+from a per-process ``psycopg_pool.ConnectionPool`` and returns them to the
+pool instead of closing them. Configure it with ``OPTIONS['pool']``, which
+accepts the ``ConnectionPool`` keyword arguments (``min_size``, ``max_size``,
+``timeout``, ``max_idle`` ...). ``CONN_MAX_AGE`` must stay 0: the pool, not
+Django, decides how long a physical connection lives.
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from psycopg_pool import ConnectionPool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _connection_pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        if self.alias not in self._connection_pools:
+            if self.settings_dict['CONN_MAX_AGE'] != 0:
+                raise ImproperlyConfigured('Pooled connections require CONN_MAX_AGE = 0.')
+            pool_options = dict(self.settings_dict['OPTIONS'].get('pool') or {})
+            connect_kwargs = self.get_connection_params()
+            # Django switches autocommit on and off itself once it gets the
+            # connection back, the pool only needs a clean idle session.
+            connect_kwargs['autocommit'] = True
+            check = ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+            with self._pools_lock:
+                if self.alias not in self._connection_pools:
+                    self._connection_pools[self.alias] = ConnectionPool(
+                        kwargs=connect_kwargs,
+                        name=self.alias,
+                        check=check,
+                        open=True,
+                        **pool_options,
+                    )
+        return self._connection_pools[self.alias]
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    @base.async_unsafe
+    def get_new_connection(self, conn_params):
+        connection = self.pool.getconn()
+        self.isolation_level = base.IsolationLevel.READ_COMMITTED
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is not None:
+            self.isolation_level = base.IsolationLevel(isolation_level)
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
+                self.connection = None
+
+
+def pool_stats():
+    """Snapshot of every pool in this process, keyed by database alias."""
+    stats = {}
+    for alias, pool in DatabaseWrapper._connection_pools.items():
+        raw = pool.get_stats()
+        size = raw.get('pool_size', 0)
+        idle = raw.get('pool_available', 0)
+        stats[alias] = {
+            'min_size': raw.get('pool_min'),
+            'max_size': raw.get('pool_max'),
+            'size': size,
+            'in_use': size - idle,
+            'idle': idle,
+            'waiting': raw.get('requests_waiting', 0),
+            'requests': raw.get('requests_num', 0),
+            'requests_queued': raw.get('requests_queued', 0),
+            'wait_ms_total': raw.get('requests_wait_ms', 0),
+            'wait_ms_avg': round(raw.get('requests_wait_ms', 0) / raw['requests_queued'], 2)
+            if raw.get('requests_queued') else 0.0,
+            'errors': raw.get('requests_errors', 0),
+        }
+    return stats
@@ -48,27 +48,45 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.db_router.ReplicaPinMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'config.microcache.MicroCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.gzip.GZipMiddleware',
+    'config.html_minify.HtmlMinifyMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'config.templates.TemplateReloadMiddleware',
 ]
 
+# nginx compresses responses (nginx/default.conf). Serving without nginx,
+# GZIP_RESPONSES=True compresses them in Django instead; the minifier has to
+# stay inside GZipMiddleware.
+if os.getenv('GZIP_RESPONSES') == 'True':
+    MIDDLEWARE.insert(MIDDLEWARE.index('config.html_minify.HtmlMinifyMiddleware'),
+                      'django.middleware.gzip.GZipMiddleware')
+
 ROOT_URLCONF = 'config.urls'
 
-COMPRESS_HTML = True
+# Collapse whitespace in HTML responses, see config/html_minify.py.
+COMPRESS_HTML = os.getenv('COMPRESS_HTML', 'True') == 'True'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    # Parse each template once per process, see config/templates.py.
+    TEMPLATE_LOADERS = [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -79,23 +97,88 @@ TEMPLATES = [
     }
 ]
 
+# nginx micro-cache for anonymous pages (config/microcache.py); 0 disables.
+# NGINX_CACHE_REFRESH_URL is nginx's internal refresh listener, e.g.
+# http://nginx:8080; content changes refresh the affected pages there.
+MICROCACHE_SECONDS = int(os.getenv('MICROCACHE_SECONDS', 30))
+NGINX_CACHE_REFRESH_URL = os.getenv('NGINX_CACHE_REFRESH_URL', '')
+
+# Let nginx send downloaded files (news/downloads.py); without nginx in
+# front Django streams them itself.
+DOWNLOADS_X_ACCEL = os.getenv('DOWNLOADS_X_ACCEL', str(not DEBUG)) == 'True'
+
+# Parse all templates at startup; reloads triggered from
+# /admin/reload-templates/ reach other processes within
+# TEMPLATE_RELOAD_CHECK_SECONDS.
+TEMPLATES_PREWARM = os.getenv('TEMPLATES_PREWARM', str(not DEBUG)) == 'True'
+TEMPLATE_RELOAD_CHECK_SECONDS = int(os.getenv('TEMPLATE_RELOAD_CHECK_SECONDS', 10))
+
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# ASGI deployment: serve index, search and the event calendar with the async
+# views from news/async_views.py. Their queries run on a bounded thread pool.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS') == 'True'
+ASYNC_DB_THREADS = int(os.getenv('ASYNC_DB_THREADS', 8))
+
+# Live forum chat over Server-Sent Events (ASGI only, see forum/stream.py).
+# New messages are fanned out through Redis pub/sub, or in-process with
+# FORUM_BROKER=memory for a single process and tests.
+FORUM_STREAM = os.getenv('FORUM_STREAM', str(ASYNC_VIEWS)) == 'True'
+FORUM_BROKER = os.getenv('FORUM_BROKER', 'redis')
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# DB_POOL=True switches to the psycopg 3 pool backend in config/postgresql_pool.
+# Without it connections are kept open for DB_CONN_MAX_AGE seconds.
+DB_POOL = os.getenv('DB_POOL') == 'True'
+DB_OPTIONS = {}
+if os.getenv('DB_STATEMENT_TIMEOUT'):
+    # Milliseconds, applied to every new connection.
+    DB_OPTIONS['options'] = f"-c statement_timeout={os.getenv('DB_STATEMENT_TIMEOUT')}"
+if DB_POOL:
+    DB_OPTIONS['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+    }
+
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE'),
+        'ENGINE': 'config.postgresql_pool' if DB_POOL else os.getenv('DB_ENGINE'),
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': DB_OPTIONS,
     }
 }
 
+# Read replicas: DB_REPLICA_HOSTS=host1[:port],host2[:port]. Public pages read
+# from them, writes and recently-writing clients stay on the primary
+# (config/db_router.py). In tests every replica mirrors ``default``.
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+    replica_host, _, replica_port = replica_host.strip().partition(':')
+    alias = f'replica_{index + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'OPTIONS': dict(DB_OPTIONS),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+
+# Seconds a client keeps reading from the primary after a write.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -138,32 +221,48 @@ STATICFILES_DIRS = (
 )
 STATIC_ROOT = os.path.join(BASE_DIR, 'static_files')
 
+# Tailwind standalone CLI used by `manage.py build_css`.
+TAILWIND_CLI = os.getenv('TAILWIND_CLI', 'tailwindcss')
+
+# Hashed file names and precompressed .gz/.br copies written by
+# collectstatic, see config/storage.py. Off in DEBUG so templates work
+# without running collectstatic.
+STATIC_MANIFEST = os.getenv('STATIC_MANIFEST', str(not DEBUG)) == 'True'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'config.storage.CompressedManifestStaticFilesStorage' if STATIC_MANIFEST
+        else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
-REDIS_HOST = 'imaq-redis-1'
-REDIS_PORT = 6379
+REDIS_HOST = os.getenv('REDIS_HOST', 'imaq-redis-1')
+REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+REDIS_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/1'
 
 CACHES = {
     "default": {
         'BACKEND': 'django_redis.cache.RedisCache',
-        'LOCATION': 'redis://imaq-redis-1:6379/1',
+        'LOCATION': REDIS_URL,
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         },
     },
     'redis_cache': {
         'BACKEND': 'django_redis.cache.RedisCache',
-        'LOCATION': 'redis://imaq-redis-1:6379/1',
+        'LOCATION': REDIS_URL,
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         },
     }
 }
 
-CACHEOPS_REDIS = "redis://imaq-redis-1:6379/1"
+CACHEOPS_REDIS = REDIS_URL
 
 CACHEOPS = {
     'news.article': {'ops': 'all', 'timeout': 60 * 15},
@@ -0,0 +1,53 @@
+"""
+Static files storage: content-hashed names plus precompressed siblings.
+
+``collectstatic`` writes ``name.<hash>.ext`` copies next to the originals
+(``ManifestStaticFilesStorage``) and then a ``.gz`` and, when the Brotli
+package is installed, a ``.br`` file for every text asset. nginx serves the
+siblings with ``gzip_static``/``brotli_static`` (see ``nginx/default.conf``),
+so static files are never compressed per request.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    compress_extensions = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.xml', '.html', '.ico', '.ttf', '.eot')
+    # Below this size the compressed file saves less than a TCP packet.
+    compress_min_size = 1024
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # A template referencing a file that is not in static/ gets the
+            # plain URL (a 404 for that asset) instead of a failed page.
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(paths) | set(self.hashed_files.values())):
+            if name.endswith(self.compress_extensions) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as f:
+            data = f.read()
+        if len(data) < self.compress_min_size:
+            return
+        path = self.path(name)
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
@@ -0,0 +1,98 @@
+"""
+Template cache management.
+
+In production the Django engine uses the cached loader (see ``TEMPLATES`` in
+settings), so a template is parsed once per process. ``prewarm_templates``
+parses everything under ``templates/`` at startup; with gunicorn's
+``preload_app`` that happens in the master and the workers inherit the
+compiled templates.
+
+``reload_templates`` drops the cache after a template-only deploy. Each
+process keeps its own cache, so the reload bumps a generation number in the
+shared cache and ``TemplateReloadMiddleware`` makes every other process
+reload when it notices the new generation.
+"""
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'templates:generation'
+TEMPLATE_EXTENSIONS = ('.html', '.xml', '.txt')
+
+_generation = None
+_checked_at = 0.0
+
+
+def template_names():
+    for root, _, files in os.walk(settings.TEMPLATES_DIR):
+        for filename in files:
+            if filename.endswith(TEMPLATE_EXTENSIONS):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, settings.TEMPLATES_DIR).replace(os.sep, '/')
+
+
+def prewarm_templates():
+    """Parse every project template into the loader cache, return how many loaded."""
+    engine = engines['django'].engine
+    loaded = 0
+    for name in sorted(template_names()):
+        try:
+            engine.get_template(name)
+            loaded += 1
+        except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+            logger.warning('Template %s could not be prewarmed: %s', name, e)
+    return loaded
+
+
+def reset_templates():
+    for loader in engines['django'].engine.template_loaders:
+        if hasattr(loader, 'reset'):
+            loader.reset()
+
+
+def _current_generation():
+    cache.add(GENERATION_KEY, 0, None)
+    return cache.get(GENERATION_KEY, 0)
+
+
+def _reload_local(generation):
+    global _generation
+    reset_templates()
+    loaded = prewarm_templates() if settings.TEMPLATES_PREWARM else 0
+    _generation = generation
+    return loaded
+
+
+def reload_templates():
+    """Reload templates in this process and signal the other processes to follow."""
+    cache.add(GENERATION_KEY, 0, None)
+    generation = cache.incr(GENERATION_KEY)
+    return generation, _reload_local(generation)
+
+
+def check_generation():
+    global _generation, _checked_at
+    now = time.monotonic()
+    if now - _checked_at < settings.TEMPLATE_RELOAD_CHECK_SECONDS:
+        return
+    _checked_at = now
+    generation = _current_generation()
+    if _generation is None:
+        _generation = generation
+    elif generation != _generation:
+        _reload_local(generation)
+
+
+class TemplateReloadMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        check_generation()
+        return self.get_response(request)
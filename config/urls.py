@@ -4,10 +4,13 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth import views as auth_views
 
+from config import views
+
 urlpatterns = [
     path('', include('news.urls')),
     path('auth/', include('users.urls')),
     path('forum/', include('forum.urls')),
+    path('admin/reload-templates/', views.reload_templates, name='reload_templates'),
     path('admin/', admin.site.urls),
     # password reset form submission
     path('reset/', auth_views.PasswordResetView.as_view(), name='password_reset'),
@@ -18,6 +21,8 @@ urlpatterns = [
     # password successfully reset
     path('reset/complete/', auth_views.PasswordResetCompleteView.as_view(), name='password_reset_complete'),
     path('trix-editor/', include('trix_editor.urls')),
+    path('metrics/db-pool/', views.db_pool_stats, name='db_pool_stats'),
+    path('csrf/', views.csrf_token, name='csrf_token'),
 ]
 
 if settings.DEBUG:
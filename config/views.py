@@ -0,0 +1,31 @@
+import os
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST, require_safe
+
+from config.postgresql_pool.base import pool_stats
+from config.templates import reload_templates as reload_template_cache
+
+
+@staff_member_required
+def db_pool_stats(request):
+    # Pools live per process, so the numbers are for the worker that answered.
+    return JsonResponse({'pid': os.getpid(), 'pools': pool_stats()})
+
+
+@staff_member_required
+@require_POST
+def reload_templates(request):
+    generation, loaded = reload_template_cache()
+    return JsonResponse({'pid': os.getpid(), 'generation': generation, 'templates': loaded})
+
+
+@never_cache
+@require_safe
+def csrf_token(request):
+    # Fills the lazy CSRF fields of cached pages (news/templatetags/lazy_csrf.py);
+    # also sets the CSRF cookie the token belongs to.
+    return JsonResponse({'token': get_token(request)})
@@ -1,6 +1,11 @@
 from django.contrib import admin
 
+from config.admin_base import BaseAdmin
 from forum.models import Message
 
-# Register your models here.
-admin.site.register(Message)
+
+@admin.register(Message)
+class MessageAdmin(BaseAdmin):
+    list_display = ('author_name', 'created_at')
+    search_fields = ('author_name',)
+    autocomplete_fields = ('user',)
@@ -0,0 +1,112 @@
+"""
+Fan-out of new chat messages to the open stream connections.
+
+Every process keeps one set of local subscriber queues (one per open
+connection). ``MemoryBroker`` delivers published messages straight to them,
+which is enough for a single process and for tests. ``RedisBroker``
+publishes through Redis pub/sub instead and runs a single listener per
+process that feeds the local queues, so a message posted on any worker
+reaches every connection while each process holds one Redis connection.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100
+
+
+def _offer(queue, data):
+    try:
+        queue.put_nowait(data)
+    except asyncio.QueueFull:
+        # A client that stopped reading loses messages instead of growing
+        # memory; it gets the history again on reload.
+        pass
+
+
+class MemoryBroker:
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, payload):
+        self.dispatch(json.dumps(payload, ensure_ascii=False))
+
+    def dispatch(self, data):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, data)
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = {entry for entry in self._subscribers if entry[1] is not queue}
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+class RedisBroker(MemoryBroker):
+    def __init__(self, url, channel):
+        super().__init__()
+        self.url = url
+        self.channel = channel
+        self._client = None
+        self._listener = None
+
+    def publish(self, payload):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        try:
+            self._client.publish(self.channel, json.dumps(payload, ensure_ascii=False))
+        except redis.RedisError as e:
+            # The message is saved; open chats only miss the live update.
+            logger.warning('Forum broker could not publish a message: %s', e)
+
+    def subscribe(self):
+        queue = super().subscribe()
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return queue
+
+    async def _listen(self):
+        while True:
+            try:
+                client = redis.asyncio.Redis.from_url(self.url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self.dispatch(message['data'].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Forum broker lost the Redis subscription, reconnecting')
+                await asyncio.sleep(1)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        if settings.FORUM_BROKER == 'memory':
+            _broker = MemoryBroker()
+        else:
+            _broker = RedisBroker(settings.REDIS_URL, 'forum:messages')
+    return _broker
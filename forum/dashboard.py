@@ -0,0 +1,79 @@
+"""
+Precomputed per-author data for the forum page.
+
+For every author the cache holds two small blobs: the sidebar counters and
+the dashboard (latest articles, documents and pinned checklists by
+category). Signals in ``forum/signals.py`` rebuild the blobs of the affected
+author whenever one of their articles, documents or checklists changes, so
+the forum page reads them with one cache round trip instead of a query per
+author and per checklist category.
+"""
+from django.core.cache import cache
+
+from news.models import Article, Document, Checklist
+
+CACHE_VERSION = 1
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _counts_key(author_id):
+    return f'forum:author-counts:{author_id}'
+
+
+def _dashboard_key(author_id):
+    return f'forum:author-dashboard:{author_id}'
+
+
+def build_counts(author_id):
+    return {
+        'articles': Article.objects.filter(author_id=author_id).count(),
+        'documents': Document.objects.filter(author_id=author_id).count(),
+        'checklists': Checklist.objects.filter(author_id=author_id).count(),
+    }
+
+
+def build_dashboard(author_id):
+    articles = list(
+        Article.objects.filter(author_id=author_id).defer('content').prefetch_related('tags')[:10]
+    )
+    documents = list(Document.objects.filter(author_id=author_id)[:3])
+    grouped_checklists = {}
+    for key, label in Checklist.CATEGORY_CHOICES:
+        items = list(
+            Checklist.objects.filter(category=key, pinned_to_main=True, author_id=author_id)
+            .order_by('-valid_from')[:5]
+        )
+        if items:
+            grouped_checklists[label] = items
+    return {'articles': articles, 'documents': documents, 'grouped_checklists': grouped_checklists}
+
+
+def refresh_author(author_id):
+    if author_id is None:
+        return
+    cache.set_many({
+        _counts_key(author_id): build_counts(author_id),
+        _dashboard_key(author_id): build_dashboard(author_id),
+    }, CACHE_TIMEOUT, version=CACHE_VERSION)
+
+
+def author_counts(author_ids):
+    """``{author_id: counts}`` for the sidebar, filling cache misses."""
+    keys = {_counts_key(author_id): author_id for author_id in author_ids}
+    cached = cache.get_many(keys, version=CACHE_VERSION)
+    counts = {keys[key]: value for key, value in cached.items()}
+    missing = {}
+    for author_id in author_ids:
+        if author_id not in counts:
+            counts[author_id] = missing[_counts_key(author_id)] = build_counts(author_id)
+    if missing:
+        cache.set_many(missing, CACHE_TIMEOUT, version=CACHE_VERSION)
+    return counts
+
+
+def author_dashboard(author_id):
+    dashboard = cache.get(_dashboard_key(author_id), version=CACHE_VERSION)
+    if dashboard is None:
+        dashboard = build_dashboard(author_id)
+        cache.set(_dashboard_key(author_id), dashboard, CACHE_TIMEOUT, version=CACHE_VERSION)
+    return dashboard
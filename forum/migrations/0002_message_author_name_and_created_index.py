@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+
+def fill_author_name(apps, schema_editor):
+    Message = apps.get_model('forum', 'Message')
+    UserProfile = apps.get_model('users', 'UserProfile')
+    names = dict(UserProfile.objects.exclude(full_name='').values_list('user_id', 'full_name'))
+    batch = []
+    for message in Message.objects.only('id', 'user_id').iterator(chunk_size=2000):
+        if message.user_id in names:
+            message.author_name = names[message.user_id]
+            batch.append(message)
+        if len(batch) >= 2000:
+            Message.objects.bulk_update(batch, ['author_name'])
+            batch = []
+    if batch:
+        Message.objects.bulk_update(batch, ['author_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('forum', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='message',
+            options={'ordering': ['created_at', 'id']},
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='author_name',
+            field=models.CharField(blank=True, max_length=200, verbose_name='Автор'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['created_at', 'id'], name='forum_message_created_idx'),
+        ),
+        migrations.RunPython(fill_author_name, migrations.RunPython.noop),
+    ]
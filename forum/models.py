@@ -4,5 +4,23 @@ from django.contrib.auth.models import User
 
 class Message(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Copied from the profile at write time so the chat renders without
+    # touching users or profiles.
+    author_name = models.CharField('Автор', max_length=200, blank=True)
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='forum_message_created_idx'),
+        ]
+
+    def to_payload(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'author': self.author_name,
+            'text': self.text,
+            'created_at': self.created_at.isoformat(),
+        }
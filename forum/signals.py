@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from news.models import Article, Document, Checklist
+from news.signals import bulk_saved
+from .broker import get_broker
+from .dashboard import refresh_author
+from .models import Message
+
+
+@receiver(post_save, sender=Message)
+def publish_message(sender, instance, created, **kwargs):
+    # Without the stream nobody listens: the chat reloads after posting.
+    if created and settings.FORUM_STREAM:
+        payload = instance.to_payload()
+        transaction.on_commit(lambda: get_broker().publish(payload))
+
+
+def _refresh_on_commit(*author_ids):
+    for author_id in set(author_ids):
+        if author_id is not None:
+            transaction.on_commit(lambda author_id=author_id: refresh_author(author_id))
+
+
+@receiver(pre_save, sender=Article)
+@receiver(pre_save, sender=Document)
+@receiver(pre_save, sender=Checklist)
+def remember_previous_author(sender, instance, update_fields=None, **kwargs):
+    # An item moved to another author changes both dashboards. A new row or
+    # a save that leaves the author alone needs no lookup.
+    if instance._state.adding or (update_fields is not None and not {'author', 'author_id'} & update_fields):
+        instance._previous_author_id = None
+        return
+    instance._previous_author_id = sender.objects.filter(pk=instance.pk).values_list(
+        'author_id', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Document)
+@receiver(post_save, sender=Checklist)
+def refresh_author_dashboard(sender, instance, **kwargs):
+    _refresh_on_commit(instance.author_id, getattr(instance, '_previous_author_id', None))
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Document)
+@receiver(post_delete, sender=Checklist)
+def refresh_author_dashboard_on_delete(sender, instance, **kwargs):
+    _refresh_on_commit(instance.author_id)
+
+
+@receiver(bulk_saved)
+def refresh_author_dashboards_on_bulk_save(sender, author_ids, **kwargs):
+    if sender in (Article, Document, Checklist):
+        _refresh_on_commit(*author_ids)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def refresh_author_dashboard_on_tags(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Article):
+        _refresh_on_commit(instance.author_id)
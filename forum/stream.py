@@ -0,0 +1,56 @@
+"""
+Server-Sent Events endpoint for the forum chat.
+
+This is a plain ASGI app mounted in ``config/asgi.py`` in front of Django:
+Django 4.2 does not notice client disconnects during streaming responses,
+so an idle connection would otherwise live forever. An open connection
+costs one coroutine and one small queue, no thread and no DB connection.
+"""
+import asyncio
+
+from forum.broker import get_broker
+
+STREAM_PATH = '/forum/stream/'
+HEARTBEAT_SECONDS = 15
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def messages_stream(scope, receive, send):
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+
+    broker = get_broker()
+    queue = broker.subscribe()
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        while True:
+            next_message = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {next_message, disconnected}, timeout=HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnected in done:
+                next_message.cancel()
+                break
+            if next_message in done:
+                body = f'data: {next_message.result()}\n\n'.encode()
+            else:
+                next_message.cancel()
+                body = b': ping\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    finally:
+        broker.unsubscribe(queue)
+        disconnected.cancel()
@@ -1,3 +1,55 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Message
+from .views import latest_messages
+
+
+class ChatHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('chat')
+        start = timezone.now() - timedelta(hours=1)
+        cls.messages = []
+        for index in range(5):
+            message = Message.objects.create(user=cls.user, author_name='Чат', text=f'm{index}')
+            # Two messages share a timestamp: the id breaks the tie.
+            created_at = start + timedelta(minutes=min(index, 3))
+            Message.objects.filter(pk=message.pk).update(created_at=created_at)
+            cls.messages.append(message.pk)
+
+    def _pages(self, limit):
+        pages = []
+        before = None
+        while True:
+            page, before = latest_messages(before, limit=limit)
+            pages.append([message.pk for message in page])
+            if before is None:
+                return pages
+
+    def test_latest_page_is_oldest_first(self):
+        page, before = latest_messages(limit=2)
+        self.assertEqual([message.pk for message in page], self.messages[-2:])
+        self.assertIsNotNone(before)
+
+    def test_cursor_walks_every_message_once(self):
+        pages = self._pages(limit=2)
+        self.assertEqual(pages, [self.messages[3:], self.messages[1:3], self.messages[:1]])
+
+    def test_history_endpoint(self):
+        _, before = latest_messages(limit=2)
+        response = self.client.get(reverse('forum:messages_history'), {'before': before})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([message['id'] for message in data['messages']], self.messages[:3])
+        self.assertIsNone(data['before'])
 
-# Create your tests here.
+    def test_bad_cursor(self):
+        for before in ('yesterday', '2024-01-01T00:00:00|x'):
+            with self.subTest(before=before):
+                response = self.client.get(reverse('forum:messages_history'), {'before': before})
+                self.assertEqual(response.status_code, 400)
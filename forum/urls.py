@@ -6,4 +6,5 @@ app_name = 'forum'
 
 urlpatterns = [
     path('', views.forum, name='forum'),
+    path('messages/', views.messages_history, name='messages_history'),
 ]
@@ -1,52 +1,97 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse
 from django.shortcuts import render, redirect
 
+from forum.dashboard import author_counts, author_dashboard
 from forum.models import Message
-from news.models import Article, Document, Checklist
+from news.models import Checklist
 from users.models import Author
 
 
+CHAT_PAGE_SIZE = 50
+
+
+def encode_cursor(message):
+    return f'{message.created_at.isoformat()}|{message.id}'
+
+
+def latest_messages(before=None, limit=CHAT_PAGE_SIZE):
+    """
+    One page of chat history, oldest first, ending right before ``before``
+    (a cursor from ``encode_cursor``). Keyset pagination on (created_at, id)
+    keeps every page an index range scan.
+    """
+    messages = Message.objects.only('id', 'user_id', 'author_name', 'text', 'created_at')
+    if before:
+        created_at, _, message_id = before.partition('|')
+        created_at = datetime.fromisoformat(created_at)
+        messages = messages.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=int(message_id))
+        )
+    page = list(messages.order_by('-created_at', '-id')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    page.reverse()
+    return page, (encode_cursor(page[0]) if has_more else None)
+
+
+def messages_history(request):
+    try:
+        page, cursor = latest_messages(request.GET.get('before'))
+    except ValueError:
+        return JsonResponse({'error': 'invalid cursor'}, status=400)
+    return JsonResponse({
+        'messages': [message.to_payload() for message in page],
+        'before': cursor,
+    })
+
+
 # Create your views here.
 def forum(request):
     if request.method == 'POST':
-        Message.objects.create(user=request.user, text=request.POST['text'])
+        message = Message.objects.create(
+            user=request.user,
+            author_name=getattr(request.user.profile, 'full_name', ''),
+            text=request.POST['text'],
+        )
+        # The live chat posts in the background and gets the message back.
+        if request.headers.get('Accept') == 'application/json':
+            return JsonResponse(message.to_payload(), status=201)
         return redirect('forum:forum')
-    authors = Author.objects.all().order_by('id')
+    authors = list(Author.objects.all().order_by('id'))
     author_id = request.GET.get('author_id')
     selected_author = None
 
     if author_id:
-        try:
-            selected_author = Author.objects.get(id=author_id)
-        except Author.DoesNotExist:
-            selected_author = None
+        selected_author = next((author for author in authors if str(author.id) == author_id), None)
 
-    if not selected_author and authors.exists():
-        selected_author = authors.first()
+    if not selected_author and authors:
+        selected_author = authors[0]
 
-    articles = Article.objects.filter(author=selected_author)[:10]
-    documents = Document.objects.filter(author=selected_author)[:3]
-    checklists_categories = Checklist.CATEGORY_CHOICES
-    grouped_checklists = {}
+    counts = author_counts([author.id for author in authors])
+    for author in authors:
+        author.counts = counts[author.id]
 
-    for key, label in checklists_categories:
-        items = Checklist.objects.filter(
-            category=key,
-            pinned_to_main=True,
-            author=selected_author
-        ).order_by('-valid_from')[:5]
-        if items.exists():
-            grouped_checklists[label] = items
+    dashboard = {'articles': [], 'documents': [], 'grouped_checklists': {}}
+    if selected_author:
+        dashboard = author_dashboard(selected_author.id)
+    checklists_categories = Checklist.CATEGORY_CHOICES
 
-    chat_messages = Message.objects.all()
+    chat_messages, chat_before = latest_messages()
 
     context = {
         'selected_author': selected_author,
         'authors': authors,
-        'articles': articles,
-        'documents': documents,
+        'articles': dashboard['articles'],
+        'documents': dashboard['documents'],
         'checklists_categories': checklists_categories,
-        'grouped_checklists': grouped_checklists,
+        'grouped_checklists': dashboard['grouped_checklists'],
         'is_forum': True,
-        'chat_messages': chat_messages
+        'chat_messages': chat_messages,
+        'chat_before': chat_before,
+        'chat_stream': settings.FORUM_STREAM,
     }
     return render(request, 'pages/forum.html', context)
\ No newline at end of file
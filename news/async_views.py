@@ -0,0 +1,236 @@
+"""
+Async versions of the I/O-heavy pages, used when the project is served over
+ASGI (``ASYNC_VIEWS=True``).
+
+The independent queries of a page are run concurrently on a bounded thread
+pool and the template is rendered once every result is in memory.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta, datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.shortcuts import render
+from django.utils import timezone
+
+from users.models import Question
+from .models import Article, Category, Tag, Instruction, Document, Law, FAQ, Event, Checklist, EventCategory, \
+    AutomationCases, RiskManagement, City, Qauipmedia
+from .views import RUSSIAN_MONTHS
+
+# Every thread keeps its own DB connection, so the pool size is also the
+# upper bound of extra connections per process.
+db_executor = ThreadPoolExecutor(max_workers=settings.ASYNC_DB_THREADS, thread_name_prefix='async-db')
+
+
+def _in_db_thread(fn):
+    close_old_connections()
+    try:
+        return fn()
+    finally:
+        close_old_connections()
+
+
+async def gather_queries(**thunks):
+    """Run ``name=callable`` pairs concurrently and return ``{name: result}``."""
+    results = await asyncio.gather(*(
+        sync_to_async(_in_db_thread, thread_sensitive=False, executor=db_executor)(thunk)
+        for thunk in thunks.values()
+    ))
+    return dict(zip(thunks, results))
+
+
+def _parse_date(value, default=None):
+    if value:
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    return default
+
+
+def _request_state(request):
+    # Session and user are lazy and backed by the database, resolve them
+    # before leaving the sync world.
+    return {
+        'user': request.user if request.user.is_authenticated else None,
+        'show_sms_confirm_modal': bool(request.session.get('user_email')),
+    }
+
+
+async def index(request):
+    search = request.GET.get('search', '').strip()
+    selected_category = request.GET.get('category')
+    state = await sync_to_async(_request_state)(request)
+    user = state['user']
+
+    today = date.today()
+    calendar_year = int(request.GET.get('calendar_year', today.year))
+    calendar_month = int(request.GET.get('calendar_month', today.month))
+    event_date = _parse_date(request.GET.get('event_date', None), today)
+
+    thunks = {
+        'categories': lambda: list(Category.objects.all()),
+        'articles': lambda: list(Article.objects.all()[:10]),
+        'tags': lambda: list(Tag.objects.all()),
+        'laws': lambda: list(Law.objects.with_is_new()),
+        'faqs': lambda: list(FAQ.objects.all()[:3]),
+        'pinned_checklists': lambda: list(
+            Checklist.objects.with_is_new().filter(pinned_to_main=True).order_by('-valid_from')[:5]),
+        'analytics_articles': lambda: list(Article.objects.filter(categories__slug='analytics')),
+        'cases': lambda: list(AutomationCases.objects.with_is_new()),
+        'risks': lambda: list(RiskManagement.objects.with_is_new().order_by('-created_date')),
+        'events': lambda: list(Event.objects.filter(date__year=calendar_year, date__month=calendar_month)),
+        'instructions': lambda: list(Instruction.objects.with_is_new()[:3]),
+        'documents': lambda: list(Document.objects.with_is_new()[:3]),
+        'videos': lambda: list(Qauipmedia.objects.all().order_by('-valid_from')[:2]),
+    }
+    for key, _ in Checklist.CATEGORY_CHOICES:
+        thunks[f'checklists_{key}'] = (lambda key=key: list(
+            Checklist.objects.with_is_new().filter(category=key, pinned_to_main=True).order_by('-valid_from')[:5]))
+    if user:
+        thunks['my_questions'] = lambda: list(Question.objects.filter(created_by=user))
+
+    results = await gather_queries(**thunks)
+
+    grouped_checklists = {}
+    for key, label in Checklist.CATEGORY_CHOICES:
+        if results[f'checklists_{key}']:
+            grouped_checklists[label] = results[f'checklists_{key}']
+
+    events_by_day = {day: [] for day in range(1, 32)}
+    for event in results['events']:
+        events_by_day[event.date.day].append(event)
+
+    my_questions = results.get('my_questions')
+    detailed_question = None
+    if my_questions is not None:
+        detailed_question_id = request.GET.get('questionDetailsId')
+        detailed_question = next((q for q in my_questions if str(q.pk) == detailed_question_id), None)
+
+    context = {
+        'search': search,
+        'articles': results['articles'],
+        'categories': results['categories'],
+        'selected_category': selected_category,
+        'tags': results['tags'],
+        'laws': results['laws'],
+        'faqs': results['faqs'],
+        'pinned_checklists': results['pinned_checklists'],
+        'cases': results['cases'],
+        'risks': results['risks'],
+        'checklists_categories': Checklist.CATEGORY_CHOICES,
+        'grouped_checklists': grouped_checklists,
+        'analytics_articles': results['analytics_articles'],
+        'videos': results['videos'],
+        # calendar
+        'calendar_year': calendar_year,
+        'calendar_month': calendar_month,
+        'event_date': event_date,
+        'events_by_day': events_by_day,
+        'event_day_localized': event_date.strftime('%d %B'),
+        'today': date.today(),
+        # instructions
+        'instructions': results['instructions'],
+
+        # documents
+        'documents': results['documents'],
+
+        # auth modal
+        'show_sms_confirm_modal': state['show_sms_confirm_modal'],
+
+        # ask question
+        'my_questions': my_questions,
+        'detailed_question': detailed_question
+    }
+    return await sync_to_async(render)(request, 'pages/index.html', context)
+
+
+async def search_results(request):
+    search = request.GET.get('search', '').strip()
+    selected_new_alias = request.GET.get('selected_new')
+
+    results = {'articles': [], 'instructions': [], 'documents': [], 'checklists': [], 'faqs': []}
+    if search:
+        results = await gather_queries(
+            articles=lambda: list(Article.objects.filter(
+                Q(title__icontains=search) | Q(description__icontains=search))),
+            instructions=lambda: list(Instruction.objects.with_is_new().filter(
+                Q(title__icontains=search) | Q(description__icontains=search)
+                | Q(file_text__icontains=search))),
+            documents=lambda: list(Document.objects.with_is_new().filter(
+                Q(title__icontains=search) | Q(description__icontains=search)
+                | Q(file_text__icontains=search))),
+            checklists=lambda: list(Checklist.objects.with_is_new().filter(
+                Q(title__icontains=search) | Q(use_case__icontains=search)
+                | Q(file_text__icontains=search))),
+            faqs=lambda: list(FAQ.objects.filter(
+                Q(question__icontains=search) | Q(answer__icontains=search))),
+        )
+
+    context = {
+        'search': search,
+        'selected_new_alias': selected_new_alias,
+        **results,
+    }
+    return await sync_to_async(render)(request, 'pages/search_results.html', context)
+
+
+async def calendar_view(request):
+    today = timezone.now().date()
+
+    search = request.GET.get('search')
+    selected_date = _parse_date(request.GET.get('date'))
+    selected_month_name = request.GET.get('month')
+    city = request.GET.get('city')
+    selected_category = request.GET.get('category')
+    month_number = RUSSIAN_MONTHS.get(selected_month_name)
+
+    events = Event.objects.all()
+    if selected_date:
+        events = events.filter(date=selected_date)
+    if month_number:
+        events = events.filter(date__month=month_number)
+    if city:
+        events = events.filter(city__name__iexact=city)
+    if selected_category:
+        events = events.filter(categories__slug=selected_category)
+    if search:
+        events = events.filter(Q(title__icontains=search) | Q(description__icontains=search))
+
+    calendar_year = int(request.GET.get('calendar_year', today.year))
+    calendar_month = int(request.GET.get('calendar_month', today.month))
+    event_date = _parse_date(request.GET.get('event_date'), today)
+    end_of_year = date(today.year, 12, 31)
+
+    results = await gather_queries(
+        events=lambda: list(events),
+        categories=lambda: list(EventCategory.objects.all()),
+        cities=lambda: list(City.objects.all()),
+        year_events=lambda: list(Event.objects.filter(date__range=(today, end_of_year)).order_by('date')),
+        calendar_events=lambda: list(Event.objects.filter(date__year=calendar_year, date__month=calendar_month)),
+    )
+
+    events_by_day = {day: [] for day in range(1, 32)}
+    for event in results['calendar_events']:
+        events_by_day[event.date.day].append(event)
+
+    context = {
+        'events': results['events'],
+        'categories': results['categories'],
+        'dates': [(today + timedelta(days=i)) for i in range(30)],
+        'selected_date': selected_date,
+        'year_events': results['year_events'],
+        'cities': results['cities'],
+        'calendar_year': calendar_year,
+        'calendar_month': calendar_month,
+        'event_date': event_date,
+        'events_by_day': events_by_day,
+        'event_day_localized': event_date.strftime('%d %B'),
+        'today': today,
+        'months': list(RUSSIAN_MONTHS.keys()),
+    }
+    return await sync_to_async(render)(request, 'pages/event_calendar.html', context)
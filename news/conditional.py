@@ -0,0 +1,102 @@
+"""
+Conditional GET for the article, AMP and laws pages.
+
+Each page has a validator: the last time its object or one of its comments
+changed. Validators live in the cache and are bumped by the signals in
+``news/signals.py``, so answering a revalidation costs one cache read and
+no rendering. An article cache miss falls back to a single aggregate query.
+
+The ETag also covers the user and the day (the pages show the user's name
+and date-dependent badges), and requests with pending flash messages are
+always rendered in full so the messages are not lost behind a 304.
+Last-Modified is only sent to anonymous visitors, for whom the page is the
+same, and never for the laws page: see ``laws_validator``.
+"""
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .models import Article, ArticleComment
+
+VALIDATOR_TIMEOUT = 60 * 60 * 24 * 7
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _article_key(alias):
+    return f'conditional:article:{alias}'
+
+
+LAWS_KEY = 'conditional:laws'
+
+
+def _latest(*values):
+    return max((value for value in values if value is not None), default=EPOCH)
+
+
+def _validator(key, compute, timeout=VALIDATOR_TIMEOUT):
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if value is not None:
+            cache.add(key, value, timeout)
+    return value
+
+
+def article_validator(alias):
+    def compute():
+        updated = Article.objects.filter(alias=alias).values_list('datetime_updated', flat=True).first()
+        if updated is None:
+            # Missing article: no validator, the view answers 404.
+            return None
+        commented = ArticleComment.objects.filter(article__alias=alias).aggregate(latest=Max('created_at'))['latest']
+        return _latest(updated, commented)
+    return _validator(_article_key(alias), compute)
+
+
+def laws_validator():
+    # The laws page lists every law next to the detailed one, so any law or
+    # comment change invalidates it. No column records when a law was last
+    # changed or deleted, so a lost validator restarts at "now": the ETag
+    # changes and clients fetch the page once more, never a stale 304. For
+    # the same reason it is no modification time and sends no Last-Modified.
+    return _validator(LAWS_KEY, timezone.now, timeout=None)
+
+
+def touch_article(alias):
+    cache.set(_article_key(alias), timezone.now(), VALIDATOR_TIMEOUT)
+
+
+def touch_articles(aliases):
+    now = timezone.now()
+    cache.set_many({_article_key(alias): now for alias in aliases}, VALIDATOR_TIMEOUT)
+
+
+def touch_laws():
+    cache.set(LAWS_KEY, timezone.now(), None)
+
+
+def _conditional(validator, send_last_modified=True):
+    def last_modified(request, *args, **kwargs):
+        if not send_last_modified or request.user.is_authenticated or len(get_messages(request)):
+            return None
+        return validator(*args, **kwargs)
+
+    def etag(request, *args, **kwargs):
+        if len(get_messages(request)):
+            return None
+        validated = validator(*args, **kwargs)
+        if validated is None:
+            return None
+        parts = [validated.isoformat(), str(request.user.pk), timezone.localdate().isoformat()]
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+article_conditional = _conditional(article_validator)
+laws_conditional = _conditional(laws_validator, send_last_modified=False)
@@ -1,16 +1,14 @@
-from django.shortcuts import get_object_or_404
 from functools import wraps
 from django.db.models import F
-from django.db import transaction
+from django.http import Http404
 from .models import Article
 
 
 def counted(f):
     @wraps(f)
-    def decorator(request, slug, *args, **kwargs):
-        with transaction.atomic():
-            counter = get_object_or_404(Article, alias=slug)
-            counter.view_count = F('view_count') + 1
-            counter.save()
-        return f(request, slug, *args, **kwargs)
+    def decorator(request, alias, *args, **kwargs):
+        # A plain UPDATE: no extra SELECT and no post_save signal per view.
+        if not Article.objects.filter(alias=alias).update(view_count=F('view_count') + 1):
+            raise Http404('No Article matches the given query.')
+        return f(request, alias, *args, **kwargs)
     return decorator
@@ -0,0 +1,68 @@
+"""
+File delivery for documents, checklists, laws and instructions.
+
+The download view only checks the request and counts it; the bytes are sent
+by nginx. The response carries ``X-Accel-Redirect`` to the internal
+``/protected-media/`` location (see ``nginx/default.conf``), so nginx
+serves the file with sendfile and Range support and no worker holds the
+transfer. Without nginx (``DOWNLOADS_X_ACCEL`` off) Django streams the file
+itself.
+
+The counter UPDATE runs on a small background pool, so a slow or locked
+row never delays the download.
+"""
+import logging
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+
+from .models import Document, Checklist, Law, Instruction
+
+logger = logging.getLogger(__name__)
+
+X_ACCEL_PREFIX = '/protected-media/'
+
+# kind in the URL -> (model, counter field, external link field, link wins
+# over the uploaded file); the precedence is the one the templates used.
+DOWNLOADS = {
+    'document': (Document, 'views', 'file_url', True),
+    'checklist': (Checklist, 'views', 'file_url', True),
+    'law': (Law, 'views', 'file_url', True),
+    'instruction': (Instruction, 'view_count', 'external_link', False),
+}
+
+_counter_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='download-counter')
+
+
+def _increment(model, counter, pk):
+    close_old_connections()
+    try:
+        model.objects.filter(pk=pk).update(**{counter: F(counter) + 1})
+    except Exception:
+        logger.exception('Could not count a download of %s %s', model.__name__, pk)
+    finally:
+        close_old_connections()
+
+
+def record_download(model, counter, pk):
+    _counter_executor.submit(_increment, model, counter, pk)
+
+
+def file_response(field_file, content_type=''):
+    filename = os.path.basename(field_file.name)
+    content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if not settings.DOWNLOADS_X_ACCEL:
+        return FileResponse(field_file.open('rb'), content_type=content_type, filename=filename)
+
+    response = HttpResponse(content_type=content_type)
+    response['X-Accel-Redirect'] = X_ACCEL_PREFIX + quote(field_file.name)
+    # Shown in the browser like the old /media/ links, saved under its name.
+    response['Content-Disposition'] = content_disposition_header(False, filename)
+    return response
@@ -0,0 +1,171 @@
+"""
+Streaming exports of content and engagement data for analysts.
+
+Used by the staff-only ``export/<kind>/`` endpoint and ``manage.py
+export_content``. Rows are read with ``values_list(...).iterator()``, which
+on PostgreSQL is a server-side cursor fetching ``CHUNK_SIZE`` rows at a
+time, and written out one by one as CSV or NDJSON (one JSON object per
+line), so an export of any size keeps memory flat on the web worker and
+the database. Reads go through the router like any other, so exports land
+on a replica when there is one.
+
+Under ASGI Django buffers a synchronous streaming body before sending it;
+serve exports from the WSGI workers or run the command for large dumps.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.utils import timezone
+
+from users.models import Question
+from .models import Article, LawComment, FAQ
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# kind -> queryset, (column, lookup) pairs, date field and category lookup
+# (None: the kind has no categories).
+EXPORTS = {
+    'articles': {
+        'queryset': lambda: Article.objects.annotate(
+            category_titles=StringAgg('categories__title', ', ', distinct=True, default=''),
+        ),
+        'columns': [
+            ('id', 'id'),
+            ('title', 'title'),
+            ('alias', 'alias'),
+            ('published_date', 'published_date'),
+            ('view_count', 'view_count'),
+            ('article_status', 'article_status'),
+            ('author', 'author__name'),
+            ('categories', 'category_titles'),
+        ],
+        'date_field': 'published_date',
+        'category': 'categories__slug',
+    },
+    'law_comments': {
+        'queryset': lambda: LawComment.objects.all(),
+        'columns': [
+            ('id', 'id'),
+            ('law_id', 'law_id'),
+            ('law_number', 'law__number'),
+            ('law_title', 'law__title'),
+            ('law_category', 'law__category'),
+            ('author', 'author_full_name'),
+            ('text', 'text'),
+            ('created_at', 'created_at'),
+        ],
+        'date_field': 'created_at',
+        'category': 'law__category',
+    },
+    'faqs': {
+        'queryset': lambda: FAQ.objects.all(),
+        'columns': [
+            ('id', 'id'),
+            ('category', 'category'),
+            ('question', 'question'),
+            ('answer', 'answer'),
+            ('author', 'author'),
+            ('view_count', 'view_count'),
+            ('is_popular', 'is_popular'),
+            ('created_at', 'created_at'),
+        ],
+        'date_field': 'created_at',
+        'category': 'category',
+    },
+    'questions': {
+        'queryset': lambda: Question.objects.annotate(answers_count=Count('answers')),
+        'columns': [
+            ('id', 'id'),
+            ('title', 'title'),
+            ('created_by', 'created_by__username'),
+            ('answer_count', 'answers_count'),
+            ('created_at', 'created_at'),
+        ],
+        'date_field': 'created_at',
+        'category': None,
+    },
+}
+
+
+class ExportError(Exception):
+    """The export cannot be built with the given parameters."""
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_rows(kind, date_from=None, date_to=None, category=None):
+    """
+    Header and row iterator of ``kind``. ``date_from`` and ``date_to`` are
+    inclusive days of the kind's date field; ``category`` is a category key
+    (a slug for articles).
+    """
+    spec = EXPORTS[kind]
+    queryset = spec['queryset']()
+    date_field = spec['date_field']
+    # Bounds on the column itself rather than __date, so its index is usable.
+    if date_from:
+        queryset = queryset.filter(**{f'{date_field}__gte': _day_start(date_from)})
+    if date_to:
+        queryset = queryset.filter(**{f'{date_field}__lt': _day_start(date_to + timedelta(days=1))})
+    if category:
+        if not spec['category']:
+            raise ExportError('Для этой выгрузки нет фильтра по категории.')
+        lookup = spec['category']
+        model = queryset.model
+        if model._meta.get_field(lookup.split('__')[0]).many_to_many:
+            # Through a subquery: a join would also narrow the aggregated titles.
+            queryset = queryset.filter(pk__in=model.objects.filter(**{lookup: category}).values('pk'))
+        else:
+            queryset = queryset.filter(**{lookup: category})
+
+    header = [name for name, _ in spec['columns']]
+    rows = queryset.order_by(date_field, 'pk').values_list(*(lookup for _, lookup in spec['columns']))
+    return header, rows.iterator(chunk_size=CHUNK_SIZE)
+
+
+# A text cell starting with one of these is run as a formula by Excel and
+# LibreOffice; a leading quote makes it plain text again.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """A file-like object for csv.writer that hands the line back."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows):
+    writer = csv.writer(_Echo())
+    # The BOM lets Excel open the file as UTF-8.
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def iter_ndjson(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def iter_export(kind, export_format='csv', **filters):
+    header, rows = export_rows(kind, **filters)
+    if export_format == 'ndjson':
+        return iter_ndjson(header, rows)
+    return iter_csv(header, rows)
@@ -0,0 +1,155 @@
+"""
+Offline processing of uploaded PDFs (``manage.py process_files``).
+
+For every PDF attached to a document, law, checklist or instruction the
+worker extracts the text into ``file_text`` (searched by the search page),
+renders the first page into a WebP ``preview`` and records ``page_count``
+and ``file_size`` (see ``FileContentMixin``).
+
+Parsing and rendering run in a process pool, away from the web workers.
+A row whose ``file_hash`` (set on upload) equals ``processed_hash`` is
+skipped without touching the file. Other files are hashed in the pool and
+only parsed when the content changed.
+"""
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pypdfium2 as pdfium
+from django.core.files.base import ContentFile
+
+from .models import Document, Law, Checklist, Instruction
+
+logger = logging.getLogger(__name__)
+
+PROCESSED_MODELS = [Document, Law, Checklist, Instruction]
+
+PREVIEW_WIDTH = 600
+PREVIEW_QUALITY = 80
+# Enough for search over any real document; keeps one broken file from
+# putting hundreds of megabytes into a row.
+MAX_TEXT_LENGTH = 2_000_000
+HASH_CHUNK = 1024 * 1024
+PENDING_PER_WORKER = 2
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def analyze_pdf(path, known_hash=''):
+    """
+    Runs in a pool process. Returns ``None`` when the file still has
+    ``known_hash``, otherwise a dict with the new hash, size, text, page
+    count and WebP preview bytes.
+    """
+    digest = file_digest(path)
+    if digest == known_hash:
+        return None
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        texts = []
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_bounded())
+            textpage.close()
+            page.close()
+
+        preview = b''
+        if len(pdf):
+            page = pdf[0]
+            width = page.get_width()
+            image = page.render(scale=PREVIEW_WIDTH / width if width else 1).to_pil()
+            page.close()
+            buffer = io.BytesIO()
+            image.convert('RGB').save(buffer, 'WEBP', quality=PREVIEW_QUALITY, method=6)
+            preview = buffer.getvalue()
+
+        # PostgreSQL text cannot hold NUL characters.
+        text = '\n'.join(texts).replace('\x00', '')[:MAX_TEXT_LENGTH]
+        return {
+            'hash': digest,
+            'size': os.path.getsize(path),
+            'text': text,
+            'page_count': len(pdf),
+            'preview': preview,
+        }
+    finally:
+        pdf.close()
+
+
+def pdf_rows(model):
+    rows = model.objects.exclude(file='').exclude(file__isnull=True).filter(file__iendswith='.pdf')
+    return rows.only('pk', 'file', 'preview', 'processed_hash', 'file_hash').order_by('pk')
+
+
+def store_result(obj, result):
+    old_preview = obj.preview.name if obj.preview else ''
+    if result['preview']:
+        obj.preview.save(f'{obj._meta.model_name}-{obj.pk}.webp', ContentFile(result['preview']), save=False)
+    else:
+        obj.preview = None
+    # A plain UPDATE: the row's own fields are untouched, so no save signals.
+    type(obj).objects.filter(pk=obj.pk).update(
+        file_text=result['text'],
+        preview=obj.preview.name if obj.preview else None,
+        page_count=result['page_count'],
+        file_size=result['size'],
+        processed_hash=result['hash'],
+    )
+    if old_preview and old_preview != obj.preview.name:
+        obj.preview.storage.delete(old_preview)
+
+
+def process_files(models=None, workers=None, force=False, log=logger.info):
+    """Process the PDFs of ``models``; returns (processed, unchanged, failed) counts."""
+    processed = unchanged = failed = 0
+    workers = workers or os.cpu_count() or 1
+    # Results carry whole texts and previews: keep only a few in flight
+    # instead of one per file in the table.
+    window = workers * PENDING_PER_WORKER
+    pending = {}
+
+    def collect(return_when):
+        nonlocal processed, unchanged, failed
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            obj = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                log(f'{type(obj).__name__} {obj.pk}: {obj.file.name} could not be processed: {e}')
+                failed += 1
+                continue
+            if result is None:
+                unchanged += 1
+                continue
+            store_result(obj, result)
+            processed += 1
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for model in models or PROCESSED_MODELS:
+            for obj in pdf_rows(model).iterator():
+                if not force and obj.file_hash and obj.file_hash == obj.processed_hash:
+                    # The hash saved with the upload matches: no need to read the file.
+                    unchanged += 1
+                    continue
+                if not os.path.exists(obj.file.path):
+                    log(f'{model.__name__} {obj.pk}: {obj.file.name} is missing')
+                    failed += 1
+                    continue
+                known_hash = '' if force else obj.processed_hash
+                pending[pool.submit(analyze_pdf, obj.file.path, known_hash)] = obj
+                if len(pending) >= window:
+                    collect(FIRST_COMPLETED)
+        if pending:
+            collect(ALL_COMPLETED)
+    return processed, unchanged, failed
@@ -8,7 +8,8 @@ class ArticleAdminForm(forms.ModelForm):
 
     class Meta:
         model = Article
-        exclude = ['image']
+        # The lock fields mirror news/edit_locks.py and are not edited by hand.
+        exclude = ['image', 'locked', 'lock_time', 'editor']
         widgets = {
             "content": TrixEditorWidget(),
         }
@@ -58,4 +59,15 @@ class AuthorAdminForm(forms.ModelForm):
         fields = '__all__'
         widgets = {
             "description": TrixEditorWidget(),
-        }
\ No newline at end of file
+        }
+
+
+class ImportForm(forms.Form):
+    file = forms.FileField(label='Файл CSV или XLSX')
+
+
+class ExportForm(forms.Form):
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    category = forms.CharField(required=False)
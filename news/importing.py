@@ -0,0 +1,311 @@
+"""
+Bulk import of laws, documents and checklists from CSV or XLSX.
+
+Used by the "Импорт" page of the admin and ``manage.py import_content``.
+The file is read row by row (``csv`` or openpyxl in read-only mode) and
+handled in batches, so memory stays flat whatever the file size:
+
+* columns are matched by field name or verbose name, categories by key
+  or label, dates also in the ``dd.mm.yyyy`` form;
+* each row is checked with ``full_clean()`` (field rules plus the model's
+  ``clean()``), and bad rows are reported with their line number;
+* valid rows are upserted on the natural key (``IMPORTS[kind]['key']``)
+  with one ``bulk_create(update_conflicts=True)`` per batch, updating only
+  the columns present in the file; checklists have no natural key and are
+  always added;
+* tags (laws) are resolved and created for the whole batch at once;
+* a batch the database rejects is retried row by row, so the rows at fault
+  are reported like validation errors.
+
+The whole import is one transaction: a file that turns out unreadable
+halfway (encoding, format) leaves nothing behind. CSV files are read as
+UTF-8, or as cp1251 (what Russian Excel saves) when they are not UTF-8.
+
+``bulk_create`` sends no save signals, so the pages listing the model are
+refreshed once at the end.
+"""
+import codecs
+import csv
+import io
+import os
+import zipfile
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, models, transaction
+from django.db.models import Q
+from slugify import slugify
+
+from config.microcache import refresh_paths
+from .conditional import touch_laws
+from .models import Law, Document, Checklist, Tag
+from .signals import CACHED_PAGES, bulk_saved
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+IMPORTS = {
+    'law': {'model': Law, 'key': ['number'], 'tags': True},
+    'document': {'model': Document, 'key': ['title', 'valid_from'], 'tags': False},
+    'checklist': {'model': Checklist, 'key': [], 'tags': False},
+}
+IMPORT_FIELDS = ['title', 'number', 'description', 'category', 'topics', 'use_case', 'file_url',
+                 'valid_from', 'valid_to', 'custom_new_days', 'pinned_to_main']
+METADATA_FIELDS = ['file_extension', 'file_size', 'file_mime', 'file_hash']
+BATCH_SIZE = 500
+# Only the first errors are kept; the rest are counted.
+MAX_REPORTED_ERRORS = 100
+DATE_FORMATS = ('%d.%m.%Y', '%d/%m/%Y')
+# Enough of a CSV to tell UTF-8 from cp1251.
+ENCODING_SAMPLE = 64 * 1024
+TAG_SEPARATORS = (';', ',')
+
+
+class ImportFileError(Exception):
+    """The file as a whole cannot be imported (format, header)."""
+
+
+class ImportResult:
+    def __init__(self):
+        self.saved = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def _csv_encoding(file):
+    sample = file.read(ENCODING_SAMPLE)
+    file.seek(0)
+    try:
+        codecs.getincrementaldecoder('utf-8-sig')().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return 'cp1251'
+    return 'utf-8-sig'
+
+
+def read_rows(file, filename):
+    """Yield ``(line number, list of cells)`` from a CSV or XLSX file, header included."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.xlsx':
+        if openpyxl is None:
+            raise ImportFileError('Для XLSX нужен пакет openpyxl.')
+        try:
+            workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, KeyError, OSError):
+            raise ImportFileError('Файл не читается как XLSX.')
+        try:
+            for line, row in enumerate(workbook.active.iter_rows(values_only=True), start=1):
+                yield line, ['' if value is None else value for value in row]
+        finally:
+            workbook.close()
+    elif extension == '.csv':
+        text = io.TextIOWrapper(file, encoding=_csv_encoding(file), newline='')
+        try:
+            sample = text.read(4096)
+            text.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t') if sample else csv.excel
+            except csv.Error:
+                dialect = csv.excel
+            yield from enumerate(csv.reader(text, dialect), start=1)
+        except UnicodeDecodeError:
+            raise ImportFileError('Не удалось определить кодировку файла, сохраните его в UTF-8.')
+        finally:
+            text.detach()
+    else:
+        raise ImportFileError('Поддерживаются файлы CSV и XLSX.')
+
+
+def _header_map(model, header, with_tags):
+    names = {}
+    for field in model._meta.concrete_fields:
+        if field.name in IMPORT_FIELDS:
+            names[field.name.lower()] = field.name
+            names[str(field.verbose_name).lower()] = field.name
+    if with_tags:
+        names['tags'] = names['теги'] = 'tags'
+
+    columns = {}
+    for index, title in enumerate(header):
+        name = names.get(str(title).strip().lower())
+        if name:
+            columns[index] = name
+    return columns
+
+
+def _to_python(field, value):
+    if isinstance(value, str):
+        value = value.strip()
+    if value in ('', None):
+        if field.has_default():
+            return field.get_default()
+        return '' if isinstance(field, models.CharField) and not field.null else None
+    if isinstance(field, models.DateField) and not isinstance(field, models.DateTimeField):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, str):
+            for date_format in DATE_FORMATS:
+                try:
+                    return datetime.strptime(value, date_format).date()
+                except ValueError:
+                    pass
+    if isinstance(field, models.BooleanField) and isinstance(value, str):
+        return value.lower() in ('1', 'true', 'да', 'yes')
+    if field.choices and isinstance(value, str):
+        by_label = {str(label).lower(): key for key, label in field.choices}
+        value = by_label.get(value.lower(), value)
+    return field.to_python(value)
+
+
+def _split_tags(value):
+    value = str(value or '')
+    for separator in TAG_SEPARATORS[1:]:
+        value = value.replace(separator, TAG_SEPARATORS[0])
+    return [name.strip() for name in value.split(TAG_SEPARATORS[0]) if name.strip()]
+
+
+def _resolve_tags(names):
+    """Return {slug: tag id} for ``names``, creating the missing tags in one query."""
+    by_slug = {slugify(name): name for name in names if slugify(name)}
+    found = dict(Tag.objects.filter(slug__in=by_slug).values_list('slug', 'id'))
+    missing = [Tag(title=name, tag_name=name, slug=slug, description='')
+               for slug, name in by_slug.items() if slug not in found]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        found = dict(Tag.objects.filter(slug__in=by_slug).values_list('slug', 'id'))
+    return found
+
+
+def _save_batch(spec, batch, update_fields, with_tags):
+    model, key = spec['model'], spec['key']
+    objs = [obj for obj, _, _ in batch.values()]
+    if not key:
+        model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+        return
+    model.objects.bulk_create(
+        objs, update_conflicts=True, unique_fields=key, update_fields=update_fields, batch_size=BATCH_SIZE,
+    )
+    if not with_tags:
+        return
+    # PostgreSQL does not return ids of updated rows, so read them by key;
+    # the kinds with tags have a one-column key.
+    key_field = key[0]
+    ids = dict(model.objects.filter(**{f'{key_field}__in': [k[0] for k in batch]})
+               .values_list(key_field, 'id'))
+    row_ids = [ids[k[0]] for k in batch]
+    tag_ids = _resolve_tags({name for _, names, _ in batch.values() for name in names})
+
+    through = model.tags.through
+    column = f'{model._meta.model_name}_id'
+    through.objects.filter(**{f'{column}__in': row_ids}).delete()
+    through.objects.bulk_create([
+        through(**{column: row_id, 'tag_id': tag_ids[slugify(name)]})
+        for row_id, (_, names, _) in zip(row_ids, batch.values())
+        for name in names if slugify(name) in tag_ids
+    ], ignore_conflicts=True, batch_size=BATCH_SIZE)
+
+
+def _batch_authors(model, key, batch):
+    """Authors of the existing rows ``batch`` updates; imported rows have none."""
+    if not key or not any(field.name == 'author' for field in model._meta.concrete_fields):
+        return set()
+    existing = Q()
+    for values in batch:
+        existing |= Q(**dict(zip(key, values)))
+    return set(model.objects.filter(existing).exclude(author=None).values_list('author_id', flat=True))
+
+
+def _flush(spec, batch, update_fields, with_tags, result):
+    try:
+        with transaction.atomic():
+            _save_batch(spec, batch, update_fields, with_tags)
+    except (IntegrityError, DataError):
+        # Find the rows at fault: each one again in its own savepoint.
+        for key, row in batch.items():
+            try:
+                with transaction.atomic():
+                    _save_batch(spec, {key: row}, update_fields, with_tags)
+            except (IntegrityError, DataError) as e:
+                result.add_error(row[2], f'Строка отклонена базой данных: {e}')
+            else:
+                result.saved += 1
+    else:
+        result.saved += len(batch)
+
+
+def import_rows(kind, rows, batch_size=BATCH_SIZE):
+    """Import ``rows`` as produced by ``read_rows`` into the model of ``kind``."""
+    spec = IMPORTS[kind]
+    model, key = spec['model'], spec['key']
+    result = ImportResult()
+
+    rows = iter(rows)
+    try:
+        _, header = next(rows)
+    except StopIteration:
+        raise ImportFileError('Файл пуст.')
+    columns = _header_map(model, header, spec['tags'])
+    missing_key = [name for name in key if name not in columns.values()]
+    if missing_key:
+        raise ImportFileError(f'Нет обязательных колонок: {", ".join(missing_key)}.')
+    with_tags = 'tags' in columns.values()
+    fields = [name for name in columns.values() if name != 'tags']
+    update_fields = [name for name in fields if name not in key]
+    if 'file_url' in fields:
+        update_fields += METADATA_FIELDS
+    if key and not update_fields:
+        # Only key columns: a conflict has nothing to change.
+        update_fields = [key[0]]
+
+    # Natural key (line number without one) -> (object, tag names, line). A
+    # key repeated in one batch keeps its last row: one upsert cannot touch a
+    # row twice.
+    batch = {}
+    author_ids = set()
+    with transaction.atomic():
+        for line, cells in rows:
+            if not any(str(cell).strip() for cell in cells):
+                continue
+            obj = model()
+            tags = []
+            try:
+                for index, name in columns.items():
+                    value = cells[index] if index < len(cells) else ''
+                    if name == 'tags':
+                        tags = _split_tags(value)
+                    else:
+                        setattr(obj, name, _to_python(model._meta.get_field(name), value))
+                if any(getattr(obj, name) in (None, '') for name in key):
+                    raise ValidationError(f'Не заполнен ключ: {", ".join(key)}.')
+                obj.full_clean(validate_unique=False, validate_constraints=False)
+            except ValidationError as e:
+                result.add_error(line, ' '.join(e.messages))
+                continue
+            obj.refresh_file_metadata()
+            batch[tuple(getattr(obj, name) for name in key) if key else line] = (obj, tags, line)
+
+            if len(batch) >= batch_size:
+                author_ids |= _batch_authors(model, key, batch)
+                _flush(spec, batch, update_fields, with_tags, result)
+                batch = {}
+        if batch:
+            author_ids |= _batch_authors(model, key, batch)
+            _flush(spec, batch, update_fields, with_tags, result)
+
+        if result.saved:
+            if model is Law:
+                transaction.on_commit(touch_laws)
+            refresh_paths(CACHED_PAGES[model](None))
+            if author_ids:
+                bulk_saved.send(sender=model, author_ids=author_ids)
+    return result
+
+
+def import_file(kind, file, filename, batch_size=BATCH_SIZE):
+    return import_rows(kind, read_rows(file, filename), batch_size)
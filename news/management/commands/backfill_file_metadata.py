@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from news.models import Document, Checklist, Law, Instruction, RiskManagement, Study
+
+MODELS = [Document, Checklist, Law, Instruction, RiskManagement, Study]
+METADATA_FIELDS = ['file_extension', 'file_size', 'file_mime', 'file_hash']
+
+
+class Command(BaseCommand):
+    help = ('Fills the file_extension, file_size, file_mime and file_hash columns of existing rows. '
+            'Files are read only for rows without a hash, unless --rehash is given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rehash', action='store_true', help='re-read every file')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for model in MODELS:
+            rows = model.objects.only('pk', 'file', model.file_link_field, *METADATA_FIELDS).order_by('pk')
+            batch = []
+            updated = 0
+            for obj in rows.iterator(chunk_size=options['batch_size']):
+                obj.refresh_file_metadata(rehash=options['rehash'])
+                batch.append(obj)
+                if len(batch) >= options['batch_size']:
+                    updated += model.objects.bulk_update(batch, METADATA_FIELDS)
+                    batch = []
+            if batch:
+                updated += model.objects.bulk_update(batch, METADATA_FIELDS)
+            self.stdout.write(f'{model.__name__}: {updated} rows')
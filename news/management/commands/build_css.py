@@ -0,0 +1,44 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Templates that make up the page shell; their classes go into the critical
+# CSS inlined in <head>.
+CRITICAL_TEMPLATES = ['base.html']
+
+
+class Command(BaseCommand):
+    help = ('Builds static/css/tailwind.min.css from the classes used in templates/ and '
+            'static/css/critical.min.css for the page shell, with the Tailwind standalone CLI.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cli', default=settings.TAILWIND_CLI, help='Tailwind CLI executable')
+
+    def handle(self, *args, **options):
+        cli = shutil.which(options['cli'])
+        if cli is None:
+            raise CommandError(f"Tailwind CLI '{options['cli']}' not found, set TAILWIND_CLI or pass --cli")
+
+        source = os.path.join(settings.BASE_DIR, 'assets', 'tailwind.css')
+        output_dir = os.path.join(settings.BASE_DIR, 'static', 'css')
+        self.build(cli, source, os.path.join(output_dir, 'tailwind.min.css'))
+
+        critical_sources = ''.join(
+            f'@source "{os.path.join(settings.TEMPLATES_DIR, name)}";\n' for name in CRITICAL_TEMPLATES
+        )
+        with tempfile.NamedTemporaryFile('w', suffix='.css', delete=False) as f:
+            f.write(f'@import "tailwindcss" source(none);\n{critical_sources}')
+        try:
+            self.build(cli, f.name, os.path.join(output_dir, 'critical.min.css'))
+        finally:
+            os.unlink(f.name)
+
+    def build(self, cli, source, output):
+        result = subprocess.run([cli, '-i', source, '-o', output, '--minify'], capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(result.stderr.strip())
+        self.stdout.write(f'{os.path.relpath(output, settings.BASE_DIR)}: {os.path.getsize(output)} bytes')
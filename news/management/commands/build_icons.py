@@ -0,0 +1,134 @@
+import json
+import os
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.text import slugify
+from PIL import Image, UnidentifiedImageError
+
+from config.templates import template_names
+
+IMG_DIR = os.path.join(settings.BASE_DIR, 'static', 'img')
+SPRITE_NAME = 'img/sprite.svg'
+SPRITE_MANIFEST = 'img/sprite.json'
+# PNG icon sets that get WebP copies.
+RASTER_DIRS = ['16', '24', '32', os.path.join('_src', 'icons')]
+
+STATIC_REF = re.compile(r"""{%\s*(?:static|icon)\s+['"](img/[^'"]+\.svg)['"]""")
+SVG_ROOT = re.compile(r'<svg\b([^>]*)>(.*)</svg>\s*$', re.DOTALL)
+ATTRIBUTE = re.compile(r'([\w:-]+)="([^"]*)"')
+NUMBER = re.compile(r'-?\d*\.\d+')
+
+
+def _strip_number(match, precision):
+    value = f'{float(match.group()):.{precision}f}'.rstrip('0').rstrip('.')
+    if value.startswith('0.'):
+        value = value[1:]
+    elif value.startswith('-0.'):
+        value = '-' + value[2:]
+    return value if value not in ('', '-') else '0'
+
+
+def optimize_svg(text, precision=3):
+    """Strip editor metadata and comments, shorten numbers and drop formatting whitespace."""
+    text = re.sub(r'<\?xml.*?\?>|<!DOCTYPE.*?>|<!--.*?-->', '', text, flags=re.DOTALL)
+    text = re.sub(r'<(metadata|title|desc|sodipodi:[\w-]+)\b.*?(/>|</\1>)', '', text, flags=re.DOTALL)
+    text = re.sub(r'\s(?:xmlns:(?!xlink)[\w-]+|(?:inkscape|sodipodi):[\w-]+|data-name)="[^"]*"', '', text)
+    text = re.sub(r'(\s(?:d|points|transform|viewBox)=")([^"]*)"',
+                  lambda m: m.group(1) + NUMBER.sub(lambda n: _strip_number(n, precision), m.group(2)) + '"',
+                  text)
+    text = re.sub(r'>\s+<', '><', text)
+    return text.strip()
+
+
+def svg_to_symbol(text, symbol_id):
+    """Turn an optimized SVG document into a <symbol>, with ids prefixed to stay unique in the sprite."""
+    match = SVG_ROOT.search(text)
+    attributes = dict(ATTRIBUTE.findall(match.group(1)))
+    body = match.group(2)
+    for element_id in re.findall(r'\sid="([^"]+)"', body):
+        body = re.sub(r'(\sid="|url\(#|href="#)%s([")])' % re.escape(element_id),
+                      r'\g<1>%s-%s\g<2>' % (symbol_id, element_id), body)
+    width, height = attributes.get('width'), attributes.get('height')
+    view_box = attributes.get('viewBox') or f'0 0 {width} {height}'
+    extra = ''.join(f' {name}="{attributes[name]}"' for name in ('fill', 'stroke') if name in attributes)
+    symbol = f'<symbol id="{symbol_id}" viewBox="{view_box}"{extra}>{body}</symbol>'
+    _, _, box_width, box_height = view_box.split()
+    return symbol, (width or box_width), (height or box_height)
+
+
+class Command(BaseCommand):
+    help = ('Optimizes SVG icons, bundles the ones used in templates into static/img/sprite.svg '
+            '(see the {% icon %} tag) and writes WebP copies of the PNG icon sets.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-uses', type=int, default=1,
+                            help='bundle icons referenced at least this many times in templates')
+        parser.add_argument('--in-place', action='store_true', help='also rewrite the source SVGs optimized')
+        parser.add_argument('--quality', type=int, default=90, help='WebP quality')
+
+    def handle(self, *args, **options):
+        self.build_sprite(options['min_uses'], options['in_place'])
+        self.build_webp(options['quality'])
+
+    def template_usage(self):
+        usage = Counter()
+        for name in template_names():
+            with open(os.path.join(settings.TEMPLATES_DIR, name), encoding='utf-8') as f:
+                usage.update(STATIC_REF.findall(f.read()))
+        return usage
+
+    def build_sprite(self, min_uses, in_place):
+        symbols = []
+        manifest = {}
+        saved = 0
+        for path, uses in sorted(self.template_usage().items()):
+            source = os.path.join(settings.BASE_DIR, 'static', path)
+            if uses < min_uses or not os.path.exists(source):
+                continue
+            with open(source, encoding='utf-8') as f:
+                original = f.read()
+            optimized = optimize_svg(original)
+            saved += len(original.encode()) - len(optimized.encode())
+            if in_place:
+                with open(source, 'w', encoding='utf-8') as f:
+                    f.write(optimized)
+
+            symbol_id = slugify(os.path.splitext(path[len('img/'):])[0].replace('/', '-'))
+            symbol, width, height = svg_to_symbol(optimized, symbol_id)
+            symbols.append(symbol)
+            manifest[path] = {'id': symbol_id, 'width': width, 'height': height}
+
+        sprite = '<svg xmlns="http://www.w3.org/2000/svg">%s</svg>' % ''.join(symbols)
+        with open(os.path.join(settings.BASE_DIR, 'static', SPRITE_NAME), 'w', encoding='utf-8') as f:
+            f.write(sprite)
+        with open(os.path.join(settings.BASE_DIR, 'static', SPRITE_MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+        self.stdout.write(f'{SPRITE_NAME}: {len(symbols)} icons, {len(sprite.encode())} bytes '
+                          f'({saved} bytes of SVG markup removed)')
+
+    def build_webp(self, quality):
+        converted = saved = 0
+        for directory in RASTER_DIRS:
+            directory = os.path.join(IMG_DIR, directory)
+            for filename in sorted(os.listdir(directory)):
+                if not filename.lower().endswith('.png'):
+                    continue
+                source = os.path.join(directory, filename)
+                target = os.path.splitext(source)[0] + '.webp'
+                try:
+                    with Image.open(source) as image:
+                        image.save(target, 'WEBP', quality=quality, method=6)
+                except UnidentifiedImageError:
+                    self.stderr.write(f'{os.path.relpath(source, IMG_DIR)}: not a readable PNG, skipped')
+                    continue
+                difference = os.path.getsize(source) - os.path.getsize(target)
+                if difference <= 0:
+                    # The PNG is already smaller, {% icon %} keeps serving it.
+                    os.remove(target)
+                    continue
+                converted += 1
+                saved += difference
+        self.stdout.write(f'WebP: {converted} icons converted, {saved} bytes saved')
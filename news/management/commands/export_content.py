@@ -0,0 +1,33 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.exporting import EXPORTS, FORMATS, ExportError, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Streams articles, law comments, FAQs or user questions as CSV or NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORTS))
+        parser.add_argument('--format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write; standard output by default.')
+        parser.add_argument('--date-from', type=date.fromisoformat, help='YYYY-MM-DD, inclusive.')
+        parser.add_argument('--date-to', type=date.fromisoformat, help='YYYY-MM-DD, inclusive.')
+        parser.add_argument('--category')
+
+    def handle(self, *args, **options):
+        try:
+            chunks = iter_export(options['kind'], options['format'], date_from=options['date_from'],
+                                 date_to=options['date_to'], category=options['category'])
+        except ExportError as e:
+            raise CommandError(e)
+
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.importing import BATCH_SIZE, IMPORTS, ImportFileError, import_file
+
+
+class Command(BaseCommand):
+    help = ('Imports laws, documents or checklists from a CSV or XLSX file. Laws and documents that '
+            'already exist are updated by their natural key, checklists are always added.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(IMPORTS))
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as f:
+                result = import_file(options['kind'], f, options['path'], options['batch_size'])
+        except (OSError, ImportFileError) as e:
+            raise CommandError(e)
+
+        for line, message in result.errors:
+            self.stderr.write(f'{line}: {message}')
+        if result.error_count > len(result.errors):
+            self.stderr.write(f'... {result.error_count - len(result.errors)} more errors')
+        self.stdout.write(f'{result.saved} rows saved, {result.error_count} rows with errors')
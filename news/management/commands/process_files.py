@@ -0,0 +1,35 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from news.file_processing import PROCESSED_MODELS, process_files
+
+
+class Command(BaseCommand):
+    help = ('Extracts text, page count and a first-page preview from the PDFs of documents, laws, '
+            'checklists and instructions. Files whose hash has not changed are skipped.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', choices=[m._meta.model_name for m in PROCESSED_MODELS],
+                            help='process only this model (repeatable)')
+        parser.add_argument('--workers', type=int, default=None, help='pool processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true', help='reprocess files with an unchanged hash')
+        parser.add_argument('--watch', action='store_true', help='keep running as a background worker')
+        parser.add_argument('--interval', type=int, default=300, help='seconds between runs with --watch')
+
+    def handle(self, *args, **options):
+        models = [apps.get_model('news', name) for name in options['model']] if options['model'] else None
+        if options['watch'] and options['force']:
+            raise CommandError('--force would reprocess every file on each run, use it without --watch')
+
+        while True:
+            processed, unchanged, failed = process_files(models, options['workers'], options['force'],
+                                                         log=self.stderr.write)
+            if processed or failed or not options['watch']:
+                self.stdout.write(f'{processed} processed, {unchanged} unchanged, {failed} failed')
+            if not options['watch']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from news.publishing import run_queued_jobs
+
+
+class Command(BaseCommand):
+    help = ('Publishes the draft selections queued by the "Опубликовать" admin action '
+            '(news/publishing.py). A job cut short by a restart runs again.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', action='store_true', help='keep running as a background worker')
+        parser.add_argument('--interval', type=int, default=5, help='seconds between queue checks with --watch')
+
+    def handle(self, *args, **options):
+        while True:
+            ran = run_queued_jobs()
+            if ran or not options['watch']:
+                self.stdout.write(f'{ran} job(s) run')
+            if not options['watch']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
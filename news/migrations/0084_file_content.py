@@ -0,0 +1,113 @@
+# Generated by Django 4.2.23 on 2026-10-19 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0083_alter_article_author_alter_checklist_author_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checklist',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Размер файла (байт)'),
+        ),
+        migrations.AddField(
+            model_name='checklist',
+            name='file_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Текст файла'),
+        ),
+        migrations.AddField(
+            model_name='checklist',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Кол-во страниц'),
+        ),
+        migrations.AddField(
+            model_name='checklist',
+            name='preview',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='uploads/previews/', verbose_name='Превью'),
+        ),
+        migrations.AddField(
+            model_name='checklist',
+            name='processed_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Хэш обработанного файла'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Размер файла (байт)'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='file_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Текст файла'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Кол-во страниц'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='preview',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='uploads/previews/', verbose_name='Превью'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='processed_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Хэш обработанного файла'),
+        ),
+        migrations.AddField(
+            model_name='instruction',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Размер файла (байт)'),
+        ),
+        migrations.AddField(
+            model_name='instruction',
+            name='file_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Текст файла'),
+        ),
+        migrations.AddField(
+            model_name='instruction',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Кол-во страниц'),
+        ),
+        migrations.AddField(
+            model_name='instruction',
+            name='preview',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='uploads/previews/', verbose_name='Превью'),
+        ),
+        migrations.AddField(
+            model_name='instruction',
+            name='processed_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Хэш обработанного файла'),
+        ),
+        migrations.AddField(
+            model_name='law',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Размер файла (байт)'),
+        ),
+        migrations.AddField(
+            model_name='law',
+            name='file_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Текст файла'),
+        ),
+        migrations.AddField(
+            model_name='law',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Кол-во страниц'),
+        ),
+        migrations.AddField(
+            model_name='law',
+            name='preview',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='uploads/previews/', verbose_name='Превью'),
+        ),
+        migrations.AddField(
+            model_name='law',
+            name='processed_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Хэш обработанного файла'),
+        ),
+    ]
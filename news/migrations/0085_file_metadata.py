@@ -0,0 +1,113 @@
+# Generated by Django 4.2.23 on 2026-10-19 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0084_file_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checklist',
+            name='file_extension',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16, verbose_name='Расширение файла'),
+        ),
+        migrations.AddField(
+            model_name='checklist',
+            name='file_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Хэш файла'),
+        ),
+        migrations.AddField(
+            model_name='checklist',
+            name='file_mime',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='MIME-тип'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='file_extension',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16, verbose_name='Расширение файла'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='file_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Хэш файла'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='file_mime',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='MIME-тип'),
+        ),
+        migrations.AddField(
+            model_name='instruction',
+            name='file_extension',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16, verbose_name='Расширение файла'),
+        ),
+        migrations.AddField(
+            model_name='instruction',
+            name='file_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Хэш файла'),
+        ),
+        migrations.AddField(
+            model_name='instruction',
+            name='file_mime',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='MIME-тип'),
+        ),
+        migrations.AddField(
+            model_name='law',
+            name='file_extension',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16, verbose_name='Расширение файла'),
+        ),
+        migrations.AddField(
+            model_name='law',
+            name='file_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Хэш файла'),
+        ),
+        migrations.AddField(
+            model_name='law',
+            name='file_mime',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='MIME-тип'),
+        ),
+        migrations.AddField(
+            model_name='riskmanagement',
+            name='file_extension',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16, verbose_name='Расширение файла'),
+        ),
+        migrations.AddField(
+            model_name='riskmanagement',
+            name='file_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Хэш файла'),
+        ),
+        migrations.AddField(
+            model_name='riskmanagement',
+            name='file_mime',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='MIME-тип'),
+        ),
+        migrations.AddField(
+            model_name='riskmanagement',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Размер файла (байт)'),
+        ),
+        migrations.AddField(
+            model_name='study',
+            name='file_extension',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16, verbose_name='Расширение файла'),
+        ),
+        migrations.AddField(
+            model_name='study',
+            name='file_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Хэш файла'),
+        ),
+        migrations.AddField(
+            model_name='study',
+            name='file_mime',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='MIME-тип'),
+        ),
+        migrations.AddField(
+            model_name='study',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Размер файла (байт)'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.23 on 2026-10-19 19:47
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0085_file_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='automationcases',
+            name='created_date',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата создания'),
+        ),
+        migrations.AlterField(
+            model_name='checklist',
+            name='valid_from',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата создания'),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='created_date',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата создания'),
+        ),
+        migrations.AlterField(
+            model_name='instruction',
+            name='created_date',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата создания'),
+        ),
+        migrations.AlterField(
+            model_name='law',
+            name='created_date',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата создания'),
+        ),
+        migrations.AlterField(
+            model_name='riskmanagement',
+            name='created_date',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата создания'),
+        ),
+    ]
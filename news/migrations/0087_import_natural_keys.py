@@ -0,0 +1,53 @@
+# Generated by Django 4.2.23 on 2026-10-19 19:51
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def _duplicates(model, key):
+    """Lines describing each group of rows sharing ``key``."""
+    # NULLs never clash in a unique constraint.
+    rows = model.objects.exclude(**{f'{name}__isnull': True for name in key})
+    groups = rows.values(*key).annotate(rows=Count('pk')).filter(rows__gt=1).values_list(*key)
+    lines = []
+    for values in groups:
+        group = dict(zip(key, values))
+        pks = model.objects.filter(**group).order_by('pk').values_list('pk', flat=True)
+        lines.append(f'  {model.__name__} {group}: id {", ".join(str(pk) for pk in pks)}')
+    return lines
+
+
+def check_keys_unique(apps, schema_editor):
+    """
+    Stop before the constraints when the data breaks them. Duplicates are
+    real records (a law number is a legal identifier), so editors merge or
+    correct them in the admin; the migration does not pick a winner.
+    """
+    Law = apps.get_model('news', 'Law')
+    Document = apps.get_model('news', 'Document')
+    # An empty number is no number.
+    Law.objects.filter(number='').update(number=None)
+    lines = _duplicates(Law, ['number']) + _duplicates(Document, ['title', 'valid_from'])
+    if lines:
+        raise RuntimeError(
+            'Fix these duplicates in the admin, then run migrate again:\n' + '\n'.join(lines)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0086_new_badge_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_keys_unique, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='document',
+            constraint=models.UniqueConstraint(fields=('title', 'valid_from'), name='news_document_title_valid_from_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='law',
+            constraint=models.UniqueConstraint(fields=('number',), name='news_law_number_unique'),
+        ),
+    ]
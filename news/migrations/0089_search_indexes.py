@@ -0,0 +1,51 @@
+# Generated by Django 4.2.23 on 2026-10-19 20:13
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0088_title_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checklist',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='news_checklist_title_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='checklist',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('use_case'), name='gin_trgm_ops'), name='news_checklist_use_case_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='checklist',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('file_text'), name='gin_trgm_ops'), name='news_checklist_file_text_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='news_document_title_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('description'), name='gin_trgm_ops'), name='news_document_desc_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('file_text'), name='gin_trgm_ops'), name='news_document_file_text_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='instruction',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='news_instr_title_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='instruction',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('description'), name='gin_trgm_ops'), name='news_instr_desc_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='instruction',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('file_text'), name='gin_trgm_ops'), name='news_instr_file_text_trgm'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import hashlib
+import mimetypes
 import os
 from urllib.parse import urlparse
 from uuid import uuid4
@@ -7,7 +9,10 @@ from django.core.exceptions import ValidationError
 from slugify import slugify
 
 from django.db import models
+from django.db.models import Max
+from django.db.models.functions import Coalesce, Now, Upper
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
@@ -16,6 +21,14 @@ from users.models import Author
 from . import types
 
 
+def search_index(name, field='title'):
+    """
+    Trigram index for ``<field>__icontains`` (site and admin search,
+    autocomplete), which PostgreSQL runs as ``UPPER(field) LIKE UPPER('%...%')``.
+    """
+    return GinIndex(OpClass(Upper(field), name='gin_trgm_ops'), name=name)
+
+
 class UUIDMixin(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
 
@@ -23,6 +36,123 @@ class UUIDMixin(models.Model):
         abstract = True
 
 
+class FileMetadataMixin(models.Model):
+    """Extension, size, MIME type and hash of the attached file, kept current on save."""
+    file_extension = models.CharField("Расширение файла", max_length=16, blank=True, default='', editable=False)
+    file_size = models.PositiveBigIntegerField("Размер файла (байт)", null=True, blank=True, editable=False)
+    file_mime = models.CharField("MIME-тип", max_length=100, blank=True, default='', editable=False)
+    file_hash = models.CharField("Хэш файла", max_length=64, blank=True, default='', editable=False)
+
+    # The field holding the external link used when there is no file.
+    file_link_field = 'file_url'
+
+    class Meta:
+        abstract = True
+
+    def refresh_file_metadata(self, rehash=False):
+        """
+        Fill the file_* columns. The file is read only for a new upload, when
+        the hash is missing or with ``rehash``; the rest comes from the name.
+        """
+        if self.file:
+            name = self.file.name
+            if rehash or not self.file._committed or not self.file_hash:
+                try:
+                    digest = hashlib.sha256()
+                    for chunk in self.file.chunks():
+                        digest.update(chunk)
+                    if self.file._committed:
+                        # A new upload stays open for the storage to save it.
+                        self.file.close()
+                    self.file_hash = digest.hexdigest()
+                    self.file_size = self.file.size
+                except OSError:
+                    # The file is gone from storage; leave it to the backfill.
+                    self.file_hash, self.file_size = '', None
+        else:
+            name = urlparse(getattr(self, self.file_link_field) or '').path
+            self.file_hash, self.file_size = '', None
+        self.file_extension = os.path.splitext(name)[1][1:].upper()[:16]  # "PDF", "DOCX"
+        self.file_mime = mimetypes.guess_type(name)[0] or ''
+
+    def save(self, *args, **kwargs):
+        self.refresh_file_metadata()
+        super().save(*args, **kwargs)
+
+
+DEFAULT_NEW_DAYS = 7
+
+
+class NewBadgeQuerySet(models.QuerySet):
+    """The "Новое" badge in SQL: the row is new for custom_new_days (default 7) after its date."""
+
+    def with_is_new(self):
+        # Rows carry is_new as a bool attribute, which templates read like the method.
+        return self.alias(new_from=self._new_from()).annotate(
+            is_new=models.ExpressionWrapper(
+                models.Q(**{f'{self.model.new_date_field}__gte': models.F('new_from')}),
+                output_field=models.BooleanField(),
+            )
+        )
+
+    def new_first(self):
+        return self.with_is_new().order_by('-is_new', f'-{self.model.new_date_field}', '-pk')
+
+    def new_only(self):
+        # The range on the indexed date column bounds the scan by the longest
+        # period in the table; the exact per-row check runs on what is left.
+        longest = self.model._base_manager.aggregate(longest=Max('custom_new_days'))['longest'] or 0
+        bound = timezone.now() - timedelta(days=max(longest, DEFAULT_NEW_DAYS))
+        return self.with_is_new().filter(**{f'{self.model.new_date_field}__gte': bound}, is_new=True)
+
+    def _new_from(self):
+        days = models.ExpressionWrapper(
+            Coalesce('custom_new_days', DEFAULT_NEW_DAYS, output_field=models.IntegerField())
+            * models.Value(timedelta(days=1)),
+            output_field=models.DurationField(),
+        )
+        return models.ExpressionWrapper(Now() - days, output_field=models.DateTimeField())
+
+
+class NewBadgeMixin(models.Model):
+    custom_new_days = models.PositiveIntegerField(
+        "Период новизны (дней)", null=True, blank=True,
+        help_text="Если указано, переопределяет стандартные 7 дней"
+    )
+
+    # The date the novelty period counts from.
+    new_date_field = 'created_date'
+
+    objects = NewBadgeQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def is_new(self):
+        days = self.custom_new_days if self.custom_new_days is not None else DEFAULT_NEW_DAYS
+        return timezone.now() - getattr(self, self.new_date_field) <= timedelta(days=days)
+
+
+class FileContentManager(models.Manager.from_queryset(NewBadgeQuerySet)):
+    # file_text can run to megabytes and no page shows it; it is only filtered on.
+    def get_queryset(self):
+        return super().get_queryset().defer('file_text')
+
+
+class FileContentMixin(FileMetadataMixin):
+    """Text, preview and page count of an uploaded PDF, filled by ``manage.py process_files``."""
+    file_text = models.TextField("Текст файла", blank=True, default='', editable=False)
+    preview = models.ImageField("Превью", upload_to='uploads/previews/', null=True, blank=True, editable=False)
+    page_count = models.PositiveIntegerField("Кол-во страниц", null=True, blank=True, editable=False)
+    processed_hash = models.CharField("Хэш обработанного файла", max_length=64, blank=True, default='',
+                                      editable=False)
+
+    objects = FileContentManager()
+
+    class Meta:
+        abstract = True
+
+
 class Category(UUIDMixin):
     slug = models.SlugField(max_length=250, unique=True, blank=True)
     title = models.CharField('Заголовок', max_length=250, blank=True)
@@ -36,6 +166,7 @@ class Category(UUIDMixin):
     class Meta:
         verbose_name = "Категория"
         verbose_name_plural = "Категория"
+        indexes = [search_index('news_category_title_trgm')]
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         if self.slug is None or self.slug == '':
@@ -59,6 +190,7 @@ class Tag(UUIDMixin):
     class Meta:
         verbose_name = "Тег"
         verbose_name_plural = "Теги"
+        indexes = [search_index('news_tag_title_trgm')]
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         if self.slug is None or self.slug == '':
@@ -115,12 +247,15 @@ class Article(UUIDMixin):
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         if self.alias is None or self.alias == '':
             self.alias = slugify(self.title)
-        return super(Article, self).save()
+            if update_fields is not None:
+                update_fields = {*update_fields, 'alias'}
+        return super(Article, self).save(force_insert, force_update, using, update_fields)
 
     class Meta:
         ordering = ['-published_date']
         verbose_name = 'Новость'
         verbose_name_plural = 'Новости'
+        indexes = [search_index('news_article_title_trgm')]
 
 
 class DraftArticle(UUIDMixin):
@@ -187,7 +322,7 @@ class FixedMenu(UUIDMixin):
         return self.name
 
 
-class Instruction(models.Model):
+class Instruction(FileContentMixin, NewBadgeMixin):
     TYPE_CHOICES = [
         ('introductory', 'Вводный'),
         ('primary', 'Первичный'),
@@ -215,7 +350,7 @@ class Instruction(models.Model):
     duration_minutes = models.PositiveIntegerField("Длительность (мин)", null=True, blank=True)
     file = models.FileField("Файл", upload_to='uploads/instructions/', null=True, blank=True)
     external_link = models.URLField("Внешняя ссылка", max_length=500, null=True, blank=True)
-    created_date = models.DateTimeField('Дата создания', default=timezone.now)
+    created_date = models.DateTimeField('Дата создания', default=timezone.now, db_index=True)
     view_count = models.IntegerField('Кол-во просмотров', default=0)
     is_popular = models.BooleanField(default=False)
 
@@ -224,14 +359,8 @@ class Instruction(models.Model):
     related_documents = models.ManyToManyField('Document', blank=True, related_name='instructions',
                                                verbose_name="Связанные документы")
 
-    custom_new_days = models.PositiveIntegerField(
-        "Период новизны (дней)", null=True, blank=True,
-        help_text="Если указано, переопределяет стандартные 7 дней"
-    )
 
-    def is_new(self):
-        days = self.custom_new_days if self.custom_new_days is not None else 7
-        return timezone.now() - self.created_date <= timedelta(days=days)
+    file_link_field = 'external_link'
 
     def clean(self):
         if self.format == 'text':
@@ -246,12 +375,18 @@ class Instruction(models.Model):
         verbose_name = "Инструктаж"
         verbose_name_plural = "Инструктажи"
         ordering = ['-created_date']
+        # Site search ORs these three; each needs an index for a bitmap OR.
+        indexes = [
+            search_index('news_instr_title_trgm'),
+            search_index('news_instr_desc_trgm', 'description'),
+            search_index('news_instr_file_text_trgm', 'file_text'),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class Document(models.Model):
+class Document(FileContentMixin, NewBadgeMixin):
     CATEGORY_CHOICES = [
         ('safety_management', 'Safety management'),
         ('incidents', 'Инциденты и расследования'),
@@ -276,52 +411,36 @@ class Document(models.Model):
         null=True,
         related_name='documents'
     )
-    created_date = models.DateTimeField('Дата создания', default=timezone.now)
-    custom_new_days = models.PositiveIntegerField(
-        "Период новизны (дней)", null=True, blank=True,
-        help_text="Если указано, переопределяет стандартные 7 дней"
-    )
-
-    def is_new(self):
-        days = self.custom_new_days if self.custom_new_days is not None else 7
-        return timezone.now() - self.created_date <= timedelta(days=days)
+    created_date = models.DateTimeField('Дата создания', default=timezone.now, db_index=True)
 
     def clean(self):
         if not self.file and not self.file_url:
             raise ValidationError('Прикрепите файл или ссылку.')
 
-    def get_file_extension(self):
-        if self.file:
-            return os.path.splitext(self.file.name)[1][1:].upper()  # "PDF", "DOCX"
-        if self.file_url:
-            path = urlparse(self.file_url).path
-            return os.path.splitext(path)[1][1:].upper()  # removes the dot
-        return ''
-
     class Meta:
         ordering = ['-created_date']
         verbose_name = "Документ"
         verbose_name_plural = "Документы"
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'valid_from'], name='news_document_title_valid_from_unique'),
+        ]
+        indexes = [
+            search_index('news_document_title_trgm'),
+            search_index('news_document_desc_trgm', 'description'),
+            search_index('news_document_file_text_trgm', 'file_text'),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class RiskManagement(models.Model):
+class RiskManagement(FileMetadataMixin, NewBadgeMixin):
     id = models.AutoField(primary_key=True)
     title = models.CharField("Название", max_length=255)
     description = models.TextField(verbose_name='Полное описание', null=True, blank=True)
     file = models.FileField("Файл", upload_to='uploads/riskManagement/', null=True, blank=True)
     file_url = models.URLField("Ссылка на файл", null=True, blank=True)
-    created_date = models.DateTimeField('Дата создания', default=timezone.now)
-    custom_new_days = models.PositiveIntegerField(
-        "Период новизны (дней)", null=True, blank=True,
-        help_text="Если указано, переопределяет стандартные 7 дней"
-    )
-
-    def is_new(self):
-        days = self.custom_new_days if self.custom_new_days is not None else 7
-        return timezone.now() - self.created_date <= timedelta(days=days)
+    created_date = models.DateTimeField('Дата создания', default=timezone.now, db_index=True)
 
     def clean(self):
         if not self.file and not self.file_url:
@@ -335,20 +454,12 @@ class RiskManagement(models.Model):
         return self.title
 
 
-class AutomationCases(models.Model):
+class AutomationCases(NewBadgeMixin):
     id = models.AutoField(primary_key=True)
     title = models.CharField("Название", max_length=255)
     description = models.TextField(verbose_name='Полное описание', null=True, blank=True)
     company = models.CharField("Компания", max_length=255, blank=True)
-    created_date = models.DateTimeField('Дата создания', default=timezone.now)
-    custom_new_days = models.PositiveIntegerField(
-        "Период новизны (дней)", null=True, blank=True,
-        help_text="Если указано, переопределяет стандартные 7 дней"
-    )
-
-    def is_new(self):
-        days = self.custom_new_days if self.custom_new_days is not None else 7
-        return timezone.now() - self.created_date <= timedelta(days=days)
+    created_date = models.DateTimeField('Дата создания', default=timezone.now, db_index=True)
 
     class Meta:
         ordering = ['-created_date']
@@ -359,7 +470,7 @@ class AutomationCases(models.Model):
         return self.title
 
 
-class Checklist(models.Model):
+class Checklist(FileContentMixin, NewBadgeMixin):
     CATEGORY_CHOICES = [
         ('checklist_1', 'Обходы по Безопасности'),
         ('checklist_2', 'Проверочные листы оборудования'),
@@ -372,7 +483,7 @@ class Checklist(models.Model):
     use_case = models.CharField("Сценарий использования", max_length=255)
     file_url = models.URLField("Ссылка на файл", null=True, blank=True)
     file = models.FileField("Файл", upload_to='uploads/checklist/', null=True, blank=True)
-    valid_from = models.DateTimeField('Дата создания', default=timezone.now)
+    valid_from = models.DateTimeField('Дата создания', default=timezone.now, db_index=True)
     views = models.IntegerField('Кол-во просмотров', default=0)
     pinned_to_main = models.BooleanField(default=False, verbose_name="Закрепить на главную")
     author = models.ForeignKey(
@@ -383,22 +494,8 @@ class Checklist(models.Model):
         null=True,
         related_name='checklists',
     )
-    custom_new_days = models.PositiveIntegerField(
-        "Период новизны (дней)", null=True, blank=True,
-        help_text="Если указано, переопределяет стандартные 7 дней"
-    )
 
-    def is_new(self):
-        days = self.custom_new_days if self.custom_new_days is not None else 7
-        return timezone.now() - self.valid_from <= timedelta(days=days)
-
-    def get_file_extension(self):
-        if self.file:
-            return os.path.splitext(self.file.name)[1][1:].upper()  # "PDF", "DOCX"
-        if self.file_url:
-            path = urlparse(self.file_url).path
-            return os.path.splitext(path)[1][1:].upper()  # removes the dot
-        return ''
+    new_date_field = 'valid_from'
 
     def clean(self):
         if not self.file and not self.file_url:
@@ -407,6 +504,11 @@ class Checklist(models.Model):
     class Meta:
         verbose_name = "Чек-лист"
         verbose_name_plural = "Чек-листы"
+        indexes = [
+            search_index('news_checklist_title_trgm'),
+            search_index('news_checklist_use_case_trgm', 'use_case'),
+            search_index('news_checklist_file_text_trgm', 'file_text'),
+        ]
 
     def __str__(self):
         return self.title
@@ -418,7 +520,7 @@ class Qauipmedia(models.Model):
     valid_from = models.DateTimeField('Дата создания', default=timezone.now)
 
 
-class Law(models.Model):
+class Law(FileContentMixin, NewBadgeMixin):
     CATEGORY_CHOICES = [
         ('main_laws', 'Основные законы и кодексы'),
         ('RLA', 'Нормативно-правовые акты (НПА)'),
@@ -441,15 +543,7 @@ class Law(models.Model):
     valid_to = models.DateField("Дата окончания действия")
     tags = models.ManyToManyField(Tag, related_name="tags_law", blank=True)
     views = models.IntegerField('Кол-во просмотров', default=0)
-    created_date = models.DateTimeField('Дата создания', default=timezone.now)
-    custom_new_days = models.PositiveIntegerField(
-        "Период новизны (дней)", null=True, blank=True,
-        help_text="Если указано, переопределяет стандартные 7 дней"
-    )
-
-    def is_new(self):
-        days = self.custom_new_days if self.custom_new_days is not None else 7
-        return timezone.now() - self.created_date <= timedelta(days=days)
+    created_date = models.DateTimeField('Дата создания', default=timezone.now, db_index=True)
 
     def clean(self):
         if not self.file and not self.file_url:
@@ -459,6 +553,8 @@ class Law(models.Model):
         ordering = ['-created_date']
         verbose_name = "Законодательство"
         verbose_name_plural = "Законодательства"
+        # Natural key of the bulk import (news/importing.py).
+        constraints = [models.UniqueConstraint(fields=['number'], name='news_law_number_unique')]
 
     def __str__(self):
         return self.title
@@ -488,7 +584,7 @@ class LawComment(models.Model):
         return f"{self.author_full_name}: {self.text[:50]}..."
 
 
-class Study(models.Model):
+class Study(FileMetadataMixin):
     CATEGORY_CHOICES = [
         ('construction', 'Строительство'),
         ('mining', 'Горная промышленность'),
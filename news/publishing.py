@@ -0,0 +1,218 @@
+"""
+Bulk publishing of draft articles (the "Опубликовать" admin action).
+
+Drafts become articles in one transaction. Articles are inserted with
+``bulk_create`` and tags and categories are copied as rows of the M2M
+through tables, so a chunk of drafts costs a handful of queries whatever
+its size. ``bulk_create`` sends no ``post_save``, so what the signals do
+for a saved article (micro-cache refresh, conditional GET validators,
+cacheops) is done once for the whole batch after commit.
+
+Selections above ``BACKGROUND_THRESHOLD`` are queued in Redis and published
+by ``manage.py publish_drafts --watch``, outside the web workers, so a
+worker restart does not lose them. A worker claims a job by moving it
+(``LMOVE``) to its own processing list, so no two workers run the same job,
+and drops it from there once finished. Jobs left in the list of a worker
+that restarted or stopped heartbeating go back to the queue and run again,
+which is safe because publishing is a single transaction and skips aliases
+that are already taken.
+``job_progress`` reads a job's state from the cache.
+"""
+import logging
+import os
+import socket
+from uuid import uuid4
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+from django_redis import get_redis_connection
+from slugify import slugify
+
+from config.microcache import refresh_paths
+from .conditional import touch_articles
+from .models import Article, DraftArticle
+from .signals import CACHED_PAGES, bulk_saved
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_CHUNK = 500
+BACKGROUND_THRESHOLD = 200
+PROGRESS_TIMEOUT = 60 * 60 * 24
+M2M_FIELDS = ('tags', 'categories')
+QUEUE_KEY = 'publish:queue'
+# A worker silent for this long is gone; its claimed jobs are queued again.
+WORKER_TTL = 60 * 5
+
+
+def _progress_key(job_id):
+    return f'publish:{job_id}'
+
+
+def _drafts_key(job_id):
+    return f'publish:{job_id}:drafts'
+
+
+def _processing_key(worker):
+    return f'publish:processing:{worker}'
+
+
+def _worker_key(worker):
+    return f'publish:worker:{worker}'
+
+
+def _copy_m2m(field_name, article_by_draft):
+    draft_field = DraftArticle._meta.get_field(field_name)
+    article_field = Article._meta.get_field(field_name)
+    source, target = draft_field.m2m_field_name(), draft_field.m2m_reverse_field_name()
+    rows = draft_field.remote_field.through.objects.filter(
+        **{f'{source}_id__in': list(article_by_draft)}
+    ).values_list(f'{source}_id', f'{target}_id')
+
+    through = article_field.remote_field.through
+    article_column, target_column = article_field.m2m_field_name(), article_field.m2m_reverse_field_name()
+    through.objects.bulk_create([
+        through(**{f'{article_column}_id': article_by_draft[draft_id], f'{target_column}_id': target_id})
+        for draft_id, target_id in rows
+    ], batch_size=PUBLISH_CHUNK)
+
+
+def publish_drafts(draft_ids, progress=None):
+    """
+    Publish the drafts with ``draft_ids`` as articles. Drafts whose alias is
+    already taken by an article are skipped. ``progress(done, total)`` is
+    called after each chunk. Returns the published and skipped counts.
+    """
+    drafts = list(DraftArticle.objects.filter(pk__in=draft_ids).order_by('datetime_created'))
+    aliases = {draft.pk: draft.alias or slugify(draft.title) for draft in drafts}
+    published = skipped = 0
+    new_articles = []
+
+    with transaction.atomic():
+        taken = set(Article.objects.filter(alias__in=aliases.values()).values_list('alias', flat=True))
+        for start in range(0, len(drafts), PUBLISH_CHUNK):
+            article_by_draft = {}
+            articles = []
+            for draft in drafts[start:start + PUBLISH_CHUNK]:
+                alias = aliases[draft.pk]
+                if alias in taken:
+                    skipped += 1
+                    continue
+                taken.add(alias)
+                article = Article(
+                    title=draft.title,
+                    alias=alias,
+                    description=draft.description,
+                    content=draft.content,
+                    image=draft.image or {},
+                )
+                article_by_draft[draft.pk] = article.pk
+                articles.append(article)
+
+            # An alias taken by a concurrent publish after the check above is
+            # left to the unique constraint: that row is skipped, not an error.
+            Article.objects.bulk_create(articles, ignore_conflicts=True)
+            inserted = set(Article.objects.filter(pk__in=[a.pk for a in articles]).values_list('pk', flat=True))
+            if len(inserted) < len(articles):
+                skipped += len(articles) - len(inserted)
+                articles = [article for article in articles if article.pk in inserted]
+                article_by_draft = {draft_pk: pk for draft_pk, pk in article_by_draft.items() if pk in inserted}
+            for field_name in M2M_FIELDS:
+                _copy_m2m(field_name, article_by_draft)
+            published += len(articles)
+            new_articles.extend(articles)
+            if progress:
+                progress(published + skipped, len(drafts))
+
+        if new_articles:
+            refresh_paths(path for article in new_articles for path in CACHED_PAGES[Article](article))
+            aliases = [article.alias for article in new_articles]
+            transaction.on_commit(lambda: _published(aliases))
+            author_ids = {article.author_id for article in new_articles} - {None}
+            if author_ids:
+                bulk_saved.send(sender=Article, author_ids=author_ids)
+    return published, skipped
+
+
+def _published(aliases):
+    touch_articles(aliases)
+    # cacheops is configured for news.article; it only caches once installed.
+    if apps.is_installed('cacheops'):
+        from cacheops import invalidate_model
+        invalidate_model(Article)
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def run_job(job_id, heartbeat=None):
+    draft_ids = cache.get(_drafts_key(job_id))
+    if draft_ids is None:
+        # Already finished (stopped before leaving the queue) or expired.
+        return
+
+    def progress(done, total):
+        cache.set(_progress_key(job_id), {'status': 'running', 'done': done, 'total': total}, PROGRESS_TIMEOUT)
+        if heartbeat:
+            heartbeat()
+
+    try:
+        published, skipped = publish_drafts(draft_ids, progress)
+        cache.set(_progress_key(job_id), {'status': 'done', 'done': len(draft_ids), 'total': len(draft_ids),
+                                          'published': published, 'skipped': skipped}, PROGRESS_TIMEOUT)
+    except Exception as e:
+        logger.exception('Publishing job %s failed', job_id)
+        cache.set(_progress_key(job_id), {'status': 'failed', 'error': str(e)}, PROGRESS_TIMEOUT)
+    cache.delete(_drafts_key(job_id))
+
+
+def _requeue(redis, worker):
+    """Put the jobs claimed by ``worker`` back at the head of the queue."""
+    while redis.lmove(_processing_key(worker), QUEUE_KEY, 'RIGHT', 'LEFT'):
+        pass
+
+
+def run_queued_jobs():
+    """Run the queued jobs in order; returns how many ran."""
+    redis = _redis()
+    # The same in a restarted container (pid 1), so its own unfinished job
+    # is picked up at once.
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    processing = _processing_key(worker)
+
+    def heartbeat():
+        redis.set(_worker_key(worker), 1, ex=WORKER_TTL)
+
+    heartbeat()
+    for key in redis.scan_iter(_processing_key('*')):
+        other = key.decode().split(':', 2)[2]
+        # A previous run of this worker, or one that stopped heartbeating.
+        if other == worker or not redis.exists(_worker_key(other)):
+            _requeue(redis, other)
+
+    ran = 0
+    while True:
+        # Claimed atomically: no other worker sees the job any more.
+        job_id = redis.lmove(QUEUE_KEY, processing, 'LEFT', 'RIGHT')
+        if job_id is None:
+            return ran
+        job_id = job_id.decode()
+        run_job(job_id, heartbeat)
+        redis.lrem(processing, 1, job_id)
+        ran += 1
+
+
+def start_publish_job(draft_ids):
+    """Queue the drafts for ``manage.py publish_drafts``; returns the job id for ``job_progress``."""
+    job_id = uuid4().hex
+    draft_ids = list(draft_ids)
+    # No timeout: the job must survive until the worker gets to it.
+    cache.set(_drafts_key(job_id), draft_ids, None)
+    cache.set(_progress_key(job_id), {'status': 'queued', 'done': 0, 'total': len(draft_ids)}, PROGRESS_TIMEOUT)
+    _redis().rpush(QUEUE_KEY, job_id)
+    return job_id
+
+
+def job_progress(job_id):
+    return cache.get(_progress_key(job_id))
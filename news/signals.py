@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from django.urls import reverse
+
+from config.microcache import refresh_paths
+from .conditional import touch_article, touch_laws
+from .models import (
+    Article, ArticleComment, Law, LawComment, Event, Document, Checklist, Instruction, FAQ, Qauipmedia, Study,
+    RiskManagement, AutomationCases,
+)
+
+
+# Sent by the bulk paths (import, publishing), which bypass post_save, with
+# the ``author_ids`` of the rows they created or changed.
+bulk_saved = Signal()
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def touch_article_validator(sender, instance, **kwargs):
+    # After commit, so a revalidation never pairs the new validator with the old page.
+    transaction.on_commit(lambda: touch_article(instance.alias))
+
+
+@receiver(post_save, sender=ArticleComment)
+@receiver(post_delete, sender=ArticleComment)
+def touch_article_validator_on_comment(sender, instance, **kwargs):
+    alias = Article.objects.filter(pk=instance.article_id).values_list('alias', flat=True).first()
+    if alias:
+        transaction.on_commit(lambda: touch_article(alias))
+
+
+@receiver(post_save, sender=Law)
+@receiver(post_delete, sender=Law)
+@receiver(post_save, sender=LawComment)
+@receiver(post_delete, sender=LawComment)
+def touch_laws_validator(sender, **kwargs):
+    transaction.on_commit(touch_laws)
+
+
+def _article_paths(article):
+    return ['/', reverse('news:all_news'), '/sitemap.xml',
+            reverse('news:news_detail', args=[article.alias]), reverse('news:amp', args=[article.alias])]
+
+
+def _article_comment_paths(comment):
+    alias = Article.objects.filter(pk=comment.article_id).values_list('alias', flat=True).first()
+    return [reverse('news:news_detail', args=[alias])] if alias else []
+
+
+# Pages showing each model, refreshed in the nginx micro-cache on change.
+CACHED_PAGES = {
+    Article: _article_paths,
+    ArticleComment: _article_comment_paths,
+    Law: lambda law: ['/', reverse('news:laws')],
+    LawComment: lambda comment: [reverse('news:laws')],
+    Event: lambda event: ['/', reverse('news:event_calendar'), reverse('news:webinars')],
+    Document: lambda document: ['/', reverse('news:documents')],
+    Checklist: lambda checklist: ['/', reverse('news:checklists')],
+    Instruction: lambda instruction: ['/', reverse('news:instructions')],
+    FAQ: lambda faq: ['/', reverse('news:faqs')],
+    Qauipmedia: lambda video: ['/', reverse('news:qauipmedia')],
+    Study: lambda study: [reverse('news:study')],
+    RiskManagement: lambda risk: ['/', reverse('news:risk_management')],
+    AutomationCases: lambda case: ['/', reverse('news:automation_cases')],
+}
+
+
+def refresh_cached_pages(sender, instance, **kwargs):
+    refresh_paths(CACHED_PAGES[sender](instance))
+
+
+for model in CACHED_PAGES:
+    post_save.connect(refresh_cached_pages, sender=model, dispatch_uid=f'microcache-{model.__name__}')
+    post_delete.connect(refresh_cached_pages, sender=model, dispatch_uid=f'microcache-delete-{model.__name__}')
@@ -0,0 +1,110 @@
+"""
+Streaming template rendering.
+
+``stream_render`` works like ``django.shortcuts.render`` but sends the
+output of every top-level template node as soon as it is rendered, so the
+browser gets ``<head>`` (styles, scripts) and the page shell before the
+querysets used further down the page are evaluated. Long lists are not
+rendered here at all: pages render their first page and load the rest
+through the paged fragment views.
+
+The body is produced after ``ReplicaPinMiddleware`` has returned, so every
+chunk is rendered under the request's primary/replica pin: a client who
+just wrote still reads the querysets of the page from the primary.
+
+Under ASGI (``ASYNC_VIEWS``) Django 4.2 reads a synchronous streaming body
+to the end before sending anything, so there the chunks are handed out by
+an async iterator that renders each one in the sync thread.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.messages import get_messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template import loader
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.loader_tags import BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode
+
+from config.db_router import is_pinned, pinned
+
+
+def _iter_nodes(template, context):
+    """Yield the rendered output of ``template`` node by node, following {% extends %}."""
+    extends = next((node for node in template.nodelist if not isinstance(node, TextNode)), None)
+    if not isinstance(extends, ExtendsNode):
+        for node in template.nodelist:
+            yield node.render_annotated(context)
+        return
+
+    # Same bookkeeping as ExtendsNode.render, but the parent is iterated
+    # instead of rendered in one go.
+    parent = extends.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(extends.blocks)
+    for node in parent.nodelist:
+        if not isinstance(node, TextNode):
+            if not isinstance(node, ExtendsNode):
+                block_context.add_blocks({n.name: n for n in parent.nodelist.get_nodes_by_type(BlockNode)})
+            break
+
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from _iter_nodes(parent, context)
+
+
+def _stream(template, context):
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            buffer = []
+            for chunk in _iter_nodes(template, context):
+                buffer.append(chunk)
+                # Small text nodes are batched so every chunk is worth a flush.
+                if sum(map(len, buffer)) >= 4096:
+                    yield ''.join(buffer)
+                    buffer = []
+            if buffer:
+                yield ''.join(buffer)
+
+
+def _with_pin(chunks, pin):
+    # Set and reset around each step: the server may pull the chunks from a
+    # different context than the one the response was created in.
+    while True:
+        with pinned(pin):
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+        yield chunk
+
+
+async def _async_chunks(chunks):
+    # Rendering runs queries, so each step is a sync call; chunks are never
+    # None.
+    step = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await step(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def stream_render(request, template_name, context=None, content_type=None, status=None):
+    # The body is rendered after the middleware has processed the response,
+    # so everything that affects headers or session state is touched now:
+    # the CSRF cookie of the forms signed-in users see (anonymous pages use
+    # lazy tokens and stay cacheable), the session (Vary: Cookie) and the
+    # flash messages that base.html shows and consumes.
+    if request.user.is_authenticated:
+        get_token(request)
+    list(get_messages(request))
+
+    template = loader.get_template(template_name).template
+    context = make_context(context, request, autoescape=template.engine.autoescape)
+    chunks = _with_pin(_stream(template, context), is_pinned())
+    if isinstance(request, ASGIRequest):
+        chunks = _async_chunks(chunks)
+    return StreamingHttpResponse(chunks, content_type=content_type, status=status)
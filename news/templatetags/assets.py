@@ -0,0 +1,71 @@
+import json
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.encoding import iri_to_uri
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+TAILWIND_CDN = '<script src="https://cdn.jsdelivr.net/npm/@tailwindcss/browser@4"></script>'
+
+
+@lru_cache(maxsize=None)
+def read_static(path):
+    found = finders.find(path)
+    if not found:
+        return None
+    with open(found, encoding='utf-8') as f:
+        return f.read()
+
+
+@register.simple_tag
+def tailwind_css():
+    """Critical CSS inline plus the full stylesheet loaded without blocking render.
+
+    Falls back to the in-browser compiler until `manage.py build_css` has run.
+    """
+    critical = read_static('css/critical.min.css')
+    if critical is None or not finders.find('css/tailwind.min.css'):
+        return mark_safe(TAILWIND_CDN)
+    href = static('css/tailwind.min.css')
+    return format_html(
+        '<style>{}</style>'
+        '<link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+        '<noscript><link rel="stylesheet" href="{}"></noscript>',
+        mark_safe(critical), href, href,
+    )
+
+
+@lru_cache(maxsize=None)
+def sprite_symbols():
+    manifest = read_static('img/sprite.json')
+    return json.loads(manifest) if manifest else {}
+
+
+@register.simple_tag
+def icon(path, alt='', **attrs):
+    """An icon from the sprite built by `manage.py build_icons`, or an <img> for the rest.
+
+    Usage: {% icon 'img/_src/icons/download.svg' class="w-6 h-6" alt="download" %}
+    PNG icons get a <picture> with the WebP copy when there is one.
+    """
+    extra = format_html_join('', ' {}="{}"', attrs.items())
+    symbol = sprite_symbols().get(path)
+    if symbol:
+        label = format_html(' role="img" aria-label="{}"', alt) if alt else mark_safe(' aria-hidden="true"')
+        return format_html(
+            '<svg width="{}" height="{}"{}{}><use href="{}#{}"></use></svg>',
+            symbol['width'], symbol['height'], extra, label, static('img/sprite.svg'), symbol['id'],
+        )
+    img = format_html('<img src="{}" alt="{}"{}>', static(path), alt, extra)
+    webp = path.rsplit('.', 1)[0] + '.webp'
+    if path.endswith('.png') and finders.find(webp):
+        # display: contents keeps the <img> itself as the layout box. srcset
+        # splits on whitespace, so spaces in file names must be escaped.
+        return format_html('<picture style="display:contents"><source srcset="{}" type="image/webp">{}</picture>',
+                           iri_to_uri(static(webp)), img)
+    return img
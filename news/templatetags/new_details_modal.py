@@ -1,5 +1,4 @@
 from django import template
-from django.db import transaction
 from django.db.models import F
 
 from news.models import Article
@@ -12,10 +11,8 @@ def render_new_details_modal(alias=None):
     article = None
     if alias:
         try:
-            with transaction.atomic():
-                article = Article.objects.get(alias__exact=alias)
-                article.view_count = F('view_count') + 1
-                article.save()
+            article = Article.objects.get(alias__exact=alias)
+            Article.objects.filter(pk=article.pk).update(view_count=F('view_count') + 1)
         except Article.DoesNotExist:
             pass
 
@@ -0,0 +1,321 @@
+from django.http import HttpResponse, StreamingHttpResponse
+import io
+from datetime import date
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+try:
+    import fakeredis
+except ImportError:  # requirements-dev.txt
+    fakeredis = None
+
+from config.db_router import PIN_COOKIE, PrimaryReplicaRouter, ReplicaPinMiddleware
+from config.html_minify import SAVED_HEADER, HtmlMinifyMiddleware, StreamMinifier, minify_html
+from . import edit_locks
+from .exporting import iter_csv, iter_ndjson
+from .importing import ENCODING_SAMPLE, ImportFileError, import_file
+from .models import Article, ArticleComment, Law, LawComment
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_PIN_SECONDS=10)
+class ReplicaPinTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def _view(self, write=False):
+        """A view recording where its reads go; ``write`` routes a write first."""
+        def view(request):
+            if write:
+                self.router.db_for_write(Article)
+            view.read_from = self.router.db_for_read(Article)
+            return HttpResponse()
+        return view
+
+    def test_get_reads_from_replica(self):
+        view = self._view()
+        response = ReplicaPinMiddleware(view)(self.factory.get('/'))
+        self.assertEqual(view.read_from, 'replica_1')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_post_with_write_reads_from_primary_and_pins(self):
+        view = self._view(write=True)
+        response = ReplicaPinMiddleware(view)(self.factory.post('/'))
+        self.assertEqual(view.read_from, 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE].value, '1')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+
+    def test_post_without_write_does_not_pin(self):
+        response = ReplicaPinMiddleware(self._view())(self.factory.post('/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_get_write_does_not_pin(self):
+        # View counters are written while serving a GET.
+        response = ReplicaPinMiddleware(self._view(write=True))(self.factory.get('/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_pin_cookie_keeps_reads_on_primary(self):
+        view = self._view()
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        ReplicaPinMiddleware(view)(request)
+        self.assertEqual(view.read_from, 'default')
+
+    def test_pin_does_not_leak_past_the_request(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        ReplicaPinMiddleware(self._view())(request)
+        self.assertEqual(self.router.db_for_read(Article), 'replica_1')
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+  <head>
+    <title>  Новости  </title>
+    <!-- dropped -->
+    <!--[if IE]>  kept  <![endif]-->
+    <style>  p  {  color: red;  }  </style>
+  </head>
+  <body   class="page   main">
+    <input value="a   b" data-note='c    d' onclick="if (a  >  b) go(  1  )"
+           title="x  y">
+    <p>Привет,    <b>мир</b>  </p>
+    <pre>  keep
+        this  </pre>
+    <script>var s = "a   b";</script>
+    <textarea>  typed
+  text  </textarea>
+    <trix-editor>  rich   text  </trix-editor>
+  </body>
+</html>
+"""
+
+
+class HtmlMinifyTests(SimpleTestCase):
+    def test_collapses_whitespace_and_drops_comments(self):
+        minified = minify_html(PAGE)
+        self.assertIn('<title> Новости </title>', minified)
+        self.assertIn('<p>Привет, <b>мир</b> </p>', minified)
+        self.assertIn('<body class="page   main">', minified)
+        self.assertNotIn('dropped', minified)
+        self.assertIn('<!--[if IE]>  kept  <![endif]-->', minified)
+
+    def test_keeps_protected_blocks(self):
+        minified = minify_html(PAGE)
+        for block in ('<pre>  keep\n        this  </pre>', '<script>var s = "a   b";</script>',
+                      '<textarea>  typed\n  text  </textarea>', '<trix-editor>  rich   text  </trix-editor>',
+                      '<style>  p  {  color: red;  }  </style>'):
+            self.assertIn(block, minified)
+
+    def test_keeps_attribute_values(self):
+        minified = minify_html(PAGE)
+        self.assertIn(
+            """<input value="a   b" data-note='c    d' onclick="if (a  >  b) go(  1  )"\ntitle="x  y">""",
+            minified,
+        )
+
+    def test_stream_matches_whole_document(self):
+        data = PAGE.encode()
+        whole = minify_html(PAGE).encode()
+        # Every chunk size splits tags, comments, blocks and UTF-8 characters somewhere.
+        for size in range(1, 64):
+            minifier = StreamMinifier()
+            out = b''.join(minifier.feed(data[i:i + size]) for i in range(0, len(data), size))
+            out += minifier.close()
+            self.assertEqual(out, whole, f'chunk size {size}')
+
+    @override_settings(COMPRESS_HTML=True)
+    def test_middleware(self):
+        middleware = HtmlMinifyMiddleware(lambda request: HttpResponse(PAGE))
+        with self.assertLogs('config.html_minify', 'INFO'):
+            response = middleware(RequestFactory().get('/'))
+        self.assertEqual(response.content, minify_html(PAGE).encode())
+        self.assertEqual(int(response[SAVED_HEADER]), len(PAGE.encode()) - len(response.content))
+
+    @override_settings(COMPRESS_HTML=True)
+    def test_middleware_streaming(self):
+        middleware = HtmlMinifyMiddleware(lambda request: StreamingHttpResponse(iter([PAGE[:100], PAGE[100:]])))
+        response = middleware(RequestFactory().get('/'))
+        with self.assertLogs('config.html_minify', 'INFO'):
+            content = b''.join(response.streaming_content)
+        self.assertEqual(content, minify_html(PAGE).encode())
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = Article.objects.create(title='Новость', alias='conditional-get', content='<p>Текст</p>')
+        cls.law = Law.objects.create(title='Закон', number='conditional-get', category='x', topics='',
+                                     file_url='https://example.kz/law.pdf',
+                                     valid_from=date(2024, 1, 1), valid_to=date(2030, 1, 1))
+
+    def _revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_article_matching_etag(self):
+        url = reverse('news:news_detail', args=[self.article.alias])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._revalidate(url, response).status_code, 304)
+        revalidated = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_article_comment_changes_etag(self):
+        url = reverse('news:news_detail', args=[self.article.alias])
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            ArticleComment.objects.create(article=self.article, text='Комментарий')
+        revalidated = self._revalidate(url, response)
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertContains(revalidated, 'Комментарий')
+
+    def test_laws_matching_etag(self):
+        url = reverse('news:laws')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self._revalidate(url, response).status_code, 304)
+
+    def test_law_comment_changes_etag(self):
+        url = reverse('news:laws')
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            LawComment.objects.create(law=self.law, text='Комментарий')
+        self.assertEqual(self._revalidate(url, response).status_code, 200)
+
+
+LAW_HEADER = 'number;title;category;valid_from;valid_to;file_url;tags\n'
+
+
+def _law_csv(*rows, encoding='utf-8'):
+    return io.BytesIO((LAW_HEADER + ''.join(f'{row}\n' for row in rows)).encode(encoding))
+
+
+class ImportTests(TestCase):
+    def test_upsert_by_natural_key(self):
+        import_file('law', _law_csv('Z-1;Старое;RLA;01.01.2024;01.01.2030;https://example.kz/1.pdf;охрана, труд'),
+                    'laws.csv')
+        self.assertEqual(Law.objects.get(number='Z-1').tags.count(), 2)
+        result = import_file('law', _law_csv('Z-1;Новое;RLA;01.02.2024;01.01.2030;https://example.kz/1.pdf;труд'),
+                             'laws.csv')
+        self.assertEqual(result.saved, 1)
+        law = Law.objects.get(number='Z-1')
+        self.assertEqual(law.title, 'Новое')
+        self.assertEqual(law.valid_from, date(2024, 2, 1))
+        self.assertEqual(list(law.tags.values_list('title', flat=True)), ['труд'])
+
+    def test_row_errors_keep_the_good_rows(self):
+        result = import_file('law', _law_csv(
+            'Z-2;Закон;RLA;01.01.2024;01.01.2030;https://example.kz/2.pdf;',
+            'Z-3;Закон;RLA;не дата;01.01.2030;https://example.kz/3.pdf;',
+            ';Без номера;RLA;01.01.2024;01.01.2030;https://example.kz/4.pdf;',
+        ), 'laws.csv')
+        self.assertEqual(result.saved, 1)
+        self.assertEqual([line for line, _ in result.errors], [3, 4])
+        self.assertEqual(list(Law.objects.values_list('number', flat=True)), ['Z-2'])
+
+    def test_cp1251(self):
+        result = import_file('law', _law_csv('Z-5;О труде;RLA;01.01.2024;01.01.2030;https://example.kz/5.pdf;',
+                                             encoding='cp1251'), 'laws.csv')
+        self.assertEqual(result.saved, 1)
+        self.assertEqual(Law.objects.get(number='Z-5').title, 'О труде')
+
+    def test_undecodable_file_imports_nothing(self):
+        # UTF-8 for the encoding check, broken further down.
+        rows = [f'Z-{i};Закон;RLA;01.01.2024;01.01.2030;https://example.kz/{i}.pdf;' for i in range(2000)]
+        data = _law_csv(*rows).getvalue()
+        self.assertGreater(len(data), ENCODING_SAMPLE)
+        with self.assertRaises(ImportFileError):
+            import_file('law', io.BytesIO(data + 'Z-x;Закон\n'.encode('cp1251')), 'laws.csv')
+        self.assertFalse(Law.objects.exists())
+
+    def test_missing_key_column(self):
+        with self.assertRaises(ImportFileError):
+            import_file('law', io.BytesIO('title\nЗакон\n'.encode()), 'laws.csv')
+
+
+class ExportTests(SimpleTestCase):
+    def test_csv_escapes_formulas(self):
+        rows = [('=HYPERLINK("http://evil")', '+1', '-2', '@SUM(A1)', '\tx', 'обычный', -3, None)]
+        lines = list(iter_csv(['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h'], rows))
+        self.assertEqual(lines[0], '\ufeffa,b,c,d,e,f,g,h\r\n')
+        self.assertEqual(lines[1], "\"'=HYPERLINK(\"\"http://evil\"\")\",'+1,'-2,'@SUM(A1),'\tx,обычный,-3,\r\n")
+
+    def test_ndjson_keeps_values(self):
+        lines = list(iter_ndjson(['a'], [('=1',)]))
+        self.assertEqual(lines, ['{"a": "=1"}\n'])
+
+
+class _InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@skipUnless(fakeredis, 'fakeredis is not installed')
+class EditLockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = Article.objects.create(title='Новость', alias='edit-lock', content='<p>Текст</p>')
+        cls.first = User.objects.create_superuser('first', password='x', first_name='Первый', last_name='Редактор')
+        cls.second = User.objects.create_superuser('second', password='x')
+
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeRedis(server=self.server)
+        for target, value in (('_redis', lambda: self.redis), ('_mirror_executor', _InlineExecutor())):
+            patcher = mock.patch.object(edit_locks, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_acquire_and_release(self):
+        holder = edit_locks.acquire(self.article.pk, self.first)
+        self.assertEqual((holder.user_id, holder.name), (self.first.pk, 'Первый Редактор'))
+        self.article.refresh_from_db()
+        self.assertTrue(self.article.locked)
+        self.assertEqual(self.article.editor, edit_locks.editor_uuid(self.first.pk))
+
+        # Someone else gets the holder back; the holder renews.
+        self.assertEqual(edit_locks.acquire(self.article.pk, self.second).user_id, self.first.pk)
+        self.assertEqual(edit_locks.acquire(self.article.pk, self.first).user_id, self.first.pk)
+        self.assertEqual(set(edit_locks.holders([self.article.pk])), {self.article.pk})
+
+        # Only the holder releases.
+        edit_locks.release(self.article.pk, self.second)
+        self.assertEqual(edit_locks.acquire(self.article.pk, self.second).user_id, self.first.pk)
+        edit_locks.release(self.article.pk, self.first)
+        self.article.refresh_from_db()
+        self.assertFalse(self.article.locked)
+        self.assertEqual(edit_locks.holders([self.article.pk]), {})
+        self.assertEqual(edit_locks.acquire(self.article.pk, self.second).user_id, self.second.pk)
+
+    def test_lease_expires(self):
+        edit_locks.acquire(self.article.pk, self.first)
+        self.assertLessEqual(self.redis.pttl(edit_locks._key(self.article.pk)), edit_locks.LOCK_TTL_SECONDS * 1000)
+        self.redis.delete(edit_locks._key(self.article.pk))
+        self.assertEqual(edit_locks.acquire(self.article.pk, self.second).user_id, self.second.pk)
+
+    def test_admin_refuses_save_from_non_holder(self):
+        edit_locks.acquire(self.article.pk, self.first)
+        self.client.force_login(self.second)
+        url = reverse('admin:news_article_change', args=[self.article.pk])
+        response = self.client.post(url, {'title': 'Чужая правка'})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.title, 'Новость')
+        response = self.client.get(url)
+        self.assertContains(response, 'редактирует Первый Редактор')
+
+    def test_heartbeat_reports_holder(self):
+        edit_locks.acquire(self.article.pk, self.first)
+        self.client.force_login(self.second)
+        response = self.client.post(reverse('admin:news_article_lock', args=[self.article.pk]))
+        self.assertEqual(response.json(), {'held': False, 'editor': 'Первый Редактор'})
+
+    def test_redis_down_fails_open(self):
+        self.server.connected = False
+        with self.assertLogs('news.edit_locks', 'WARNING'):
+            self.assertIsNone(edit_locks.acquire(self.article.pk, self.first))
+            self.assertEqual(edit_locks.holders([self.article.pk]), {})
@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.sitemaps.views import sitemap
 from django.contrib.auth import views as auth_views
 from .sitemaps import ArticleSitemap
-from news import views
+from news import views, async_views
 
 app_name = 'news'
 
+# Under ASGI the I/O-heavy pages are served by their async versions.
+io_views = async_views if settings.ASYNC_VIEWS else views
+
 sitemaps = {
     'articlemodel': ArticleSitemap,
 }
@@ -13,10 +17,10 @@ sitemaps = {
 urlpatterns = [
     path('news/<str:alias>/', views.news_detail, name='news_detail'),
     path('news/<str:alias>/comment', views.create_article_comment, name='create_article_comment'),
-    path('', views.index, name='index'),
+    path('', io_views.index, name='index'),
     path('news/', views.all_news, name='all_news'),
     path('instructions/', views.instructions_view, name='instructions'),
-    path('search_results/', views.search_results, name='search_results'),
+    path('search_results/', io_views.search_results, name='search_results'),
     path('category/<str:slug>/', views.category_detail, name='category'),
     path('tag/<str:slug>/', views.tag_detail, name='tag_detail'),
     path('rules/', views.rules, name='rules'),
@@ -25,14 +29,17 @@ urlpatterns = [
     path('about/', views.about, name='about'),
     path('site_maps/', views.maps, name='maps'),
     path('qauipmedia/', views.qauipmedia, name='qauipmedia'),
+    path('qauipmedia/fragment/', views.qauipmedia_fragment, name='qauipmedia_fragment'),
     path('documents/', views.documents_view, name='documents'),
     path('laws/', views.laws_view, name='laws'),
+    path('laws/fragment/', views.laws_fragment, name='laws_fragment'),
     path('laws/<str:id>/comment', views.create_law_comment, name='create_law_comment'),
     path('study/', views.study, name='study'),
     path('webinars/', views.webinars_view, name='webinars'),
+    path('webinars/fragment/', views.webinars_fragment, name='webinars_fragment'),
     path('faqs/', views.faqs, name='faqs'),
     path('checklists/', views.checklists, name='checklists'),
-    path('event_calendar/', views.calendar_view, name='event_calendar'),
+    path('event_calendar/', io_views.calendar_view, name='event_calendar'),
     path('get_events_by_date/', views.get_events_by_date_api, name='get_events_by_date'),
     path('get_news_by_date/', views.get_news_by_date_api, name='get_news_by_date'),
     path('automation_cases/', views.automation_cases, name='automation_cases'),
@@ -41,5 +48,7 @@ urlpatterns = [
 
     # AMP
     path('amp/<str:alias>/', views.amp_views, name='amp'),
+    path('download/<str:kind>/<int:pk>/', views.download_file, name='download'),
+    path('export/<str:kind>/', views.export_data, name='export'),
     path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
 ]
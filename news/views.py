@@ -1,23 +1,51 @@
 from datetime import date, timedelta, datetime
+from urllib.parse import urlencode
 
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q, Prefetch
+from django.db.models import Q, Prefetch, Count
 from django.core.paginator import Paginator
 from django.utils import timezone
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
 
 from users.models import Question
 from users.utils.forms import add_form_errors_to_messages
 from users.utils.urls import add_query_param_to_url
-from .form import ArticleCommentForm, LawCommentForm
+from .form import ArticleCommentForm, LawCommentForm, ExportForm
 from .mixins import three_days_ago
 from .models import Article, Category, Tag, FixedMenu, Instruction, Document, Law, Study, FAQ, \
     Event, Checklist, EventCategory, AutomationCases, RiskManagement, City, Qauipmedia, Author
+from .conditional import article_conditional, laws_conditional
 from .decorators import counted
+from .downloads import DOWNLOADS, record_download, file_response
+from .exporting import EXPORTS, FORMATS, ExportError, iter_export
+from .streaming import stream_render
+
+LAWS_PAGE_SIZE = 20
+VIDEOS_PAGE_SIZE = 9
+WEBINARS_PAGE_SIZE = 10
+
+
+def fragment_page(queryset, page_number, size):
+    """One page of ``queryset`` without a COUNT query: (items, next page number or None)."""
+    offset = (page_number - 1) * size
+    items = list(queryset[offset:offset + size + 1])
+    return items[:size], (page_number + 1 if len(items) > size else None)
+
+
+def get_page_number(request):
+    try:
+        return max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        return 1
 
 
 @counted
+@article_conditional
 def amp_views(request, alias):
     article = get_object_or_404(Article.objects.prefetch_related('categories', 'tags'), alias=alias)
     menu = FixedMenu.objects.all()
@@ -35,16 +63,19 @@ def search_results(request):
         Q(title__icontains=search) | Q(description__icontains=search)
     ) if search else []
 
-    instructions = Instruction.objects.filter(
+    instructions = Instruction.objects.with_is_new().filter(
         Q(title__icontains=search) | Q(description__icontains=search)
+        | Q(file_text__icontains=search)
     ) if search else []
 
-    documents = Document.objects.filter(
+    documents = Document.objects.with_is_new().filter(
         Q(title__icontains=search) | Q(description__icontains=search)
+        | Q(file_text__icontains=search)
     ) if search else []
 
-    checklists = Checklist.objects.filter(
+    checklists = Checklist.objects.with_is_new().filter(
         Q(title__icontains=search) | Q(use_case__icontains=search)
+        | Q(file_text__icontains=search)
     ) if search else []
 
     faqs = FAQ.objects.filter(
@@ -69,20 +100,20 @@ def index(request):
     categories = Category.objects.all()
     articles = Article.objects.all()[:10]
     tags = Tag.objects.all()
-    laws = Law.objects.all()
+    laws = Law.objects.with_is_new()
     faqs = FAQ.objects.all()[:3]
-    pinned_checklists = Checklist.objects.filter(pinned_to_main=True).order_by('-valid_from')[:5]
+    pinned_checklists = Checklist.objects.with_is_new().filter(pinned_to_main=True).order_by('-valid_from')[:5]
     checklists_categories = Checklist.CATEGORY_CHOICES
     analytics_articles = Article.objects.filter(categories__slug='analytics')
     grouped_checklists = {}
 
     for key, label in checklists_categories:
-        items = Checklist.objects.filter(category=key, pinned_to_main=True).order_by('-valid_from')[:5]
+        items = Checklist.objects.with_is_new().filter(category=key, pinned_to_main=True).order_by('-valid_from')[:5]
         if items.exists():
             grouped_checklists[label] = items
 
-    cases = AutomationCases.objects.all()
-    risks = RiskManagement.objects.all().order_by('-created_date')
+    cases = AutomationCases.objects.with_is_new()
+    risks = RiskManagement.objects.with_is_new().order_by('-created_date')
     # calendar
     today = date.today()
     calendar_year = int(request.GET.get('calendar_year', today.year))
@@ -100,10 +131,10 @@ def index(request):
         events_by_day[event.date.day].append(event)
 
     # instructions
-    instructions = Instruction.objects.all()[:3]
+    instructions = Instruction.objects.with_is_new()[:3]
 
     # documents
-    documents = Document.objects.all()[:3]
+    documents = Document.objects.with_is_new()[:3]
 
     # qauipmedia
     videos = Qauipmedia.objects.all().order_by('-valid_from')[:2]
@@ -208,9 +239,16 @@ def get_news_by_date_api(request):
 
 
 def qauipmedia(request):
-    videos = Qauipmedia.objects.all().order_by('-valid_from')
-    context = {'videos': videos}
-    return render(request, 'pages/qauipmedia.html', context)
+    videos, next_page = fragment_page(Qauipmedia.objects.order_by('-valid_from', '-id'), 1, VIDEOS_PAGE_SIZE)
+    context = {'videos': videos, 'next_page': next_page}
+    return stream_render(request, 'pages/qauipmedia.html', context)
+
+
+def qauipmedia_fragment(request):
+    videos, next_page = fragment_page(Qauipmedia.objects.order_by('-valid_from', '-id'),
+                                      get_page_number(request), VIDEOS_PAGE_SIZE)
+    context = {'videos': videos, 'next_page': next_page}
+    return render(request, 'includes/qauipmedia/list.html', context)
 
 
 def all_news(request):
@@ -278,6 +316,7 @@ def all_news(request):
     return render(request, 'pages/all_news.html', context)
 
 
+@article_conditional
 def news_detail(request, alias):
     article = get_object_or_404(Article, alias=alias)
 
@@ -357,14 +396,14 @@ def create_article_comment(request, alias):
 def documents_view(request):
     categories = Document.CATEGORY_CHOICES
     selected_category = request.GET.get('category')
-    side_documents = Document.objects.all()[:5]
+    side_documents = Document.objects.with_is_new()[:5]
     search = request.GET.get('search')
     sort = request.GET.get('sort')
 
     if not selected_category and categories:
         selected_category = categories[0][0]
 
-    documents = Document.objects.filter(category=selected_category)
+    documents = Document.objects.with_is_new().filter(category=selected_category)
 
     if search:
         documents = documents.filter(
@@ -376,6 +415,8 @@ def documents_view(request):
         documents = documents.order_by(
             '-views'
         )
+    elif sort == 'new':
+        documents = documents.new_first()
 
     category_limits = {
         'Safety management': 4,
@@ -401,9 +442,9 @@ def documents_view(request):
 
 
 def automation_cases(request):
-    cases = AutomationCases.objects.all()
+    cases = AutomationCases.objects.with_is_new()
     search = request.GET.get('search')
-    side_cases = AutomationCases.objects.all()[:5]
+    side_cases = AutomationCases.objects.with_is_new()[:5]
     if search:
         cases = cases.filter(
             Q(title__icontains=search) |
@@ -417,9 +458,9 @@ def automation_cases(request):
 
 
 def risk_management(request):
-    risks = RiskManagement.objects.all().order_by('-created_date')
+    risks = RiskManagement.objects.with_is_new().order_by('-created_date')
     search = request.GET.get('search')
-    side_risks = RiskManagement.objects.all().order_by('-created_date')[:5]
+    side_risks = RiskManagement.objects.with_is_new().order_by('-created_date')[:5]
     if search:
         risks = risks.filter(
             Q(title__icontains=search) |
@@ -438,12 +479,12 @@ def instructions_view(request):
     grouped_instructions = {}
     search = request.GET.get('search')
     sort = request.GET.get('sort')
-    side_instructions = Instruction.objects.all().order_by('-created_date')[:5]
+    side_instructions = Instruction.objects.with_is_new().order_by('-created_date')[:5]
 
     if selected_category:
-        instructions = Instruction.objects.filter(category=selected_category)
+        instructions = Instruction.objects.with_is_new().filter(category=selected_category)
     else:
-        instructions = Instruction.objects.all()
+        instructions = Instruction.objects.with_is_new()
 
     if search:
         instructions = instructions.filter(
@@ -453,6 +494,8 @@ def instructions_view(request):
         instructions = instructions.order_by(
             'is_popular'
         ).order_by('-view_count')
+    elif sort == 'new':
+        instructions = instructions.new_first()
 
     category_limits = {
         'Вводный': 5,
@@ -474,6 +517,20 @@ def instructions_view(request):
     return render(request, 'pages/instructions.html', context)
 
 
+def filter_laws(search=None, category=None):
+    # The id tiebreak keeps offset pages stable for laws created together.
+    laws = Law.objects.with_is_new().order_by('-created_date', '-id')
+    if search:
+        laws = laws.filter(
+            Q(title__icontains=search) |
+            Q(description__icontains=search)
+        )
+    if category:
+        laws = laws.filter(category=category)
+    return laws
+
+
+@laws_conditional
 def laws_view(request):
     search = request.GET.get('search')
     selected_category = request.GET.get('category')
@@ -481,25 +538,20 @@ def laws_view(request):
 
     categories = Law.CATEGORY_CHOICES
     categorized_laws = []
-    laws = Law.objects.all()
-    tags = Tag.objects.all()
-    side_laws = Law.objects.all().order_by('-created_date')
-
-    if search:
-        laws = laws.filter(
-            Q(title__icontains=search) |
-            Q(description__icontains=search)
-        )
-
-    if selected_category:
-        laws = laws.filter(category=selected_category)
+    laws = filter_laws(search, selected_category)
+    side_laws = Law.objects.with_is_new().order_by('-created_date')[:3]
 
+    # One grouped query tells which categories have laws; each category then
+    # renders its first page and loads the rest through laws_fragment.
+    category_counts = dict(laws.order_by().values_list('category').annotate(total=Count('id')))
     for value, display_name in categories:
-        laws_in_category = laws.filter(category=value)
-        if laws_in_category.exists():
+        if category_counts.get(value):
+            laws_in_category, next_page = fragment_page(laws.filter(category=value), 1, LAWS_PAGE_SIZE)
             categorized_laws.append({
                 'title': display_name,
-                'laws': laws_in_category
+                'laws': laws_in_category,
+                'next_page': next_page,
+                'query': urlencode({'category': value, 'search': search or ''}),
             })
 
     detailed_law = None
@@ -512,11 +564,22 @@ def laws_view(request):
             pass
 
     context = {
-        'laws': laws, 'categories': categories, 'categorized_laws': categorized_laws, "tags": tags,
+        'categories': categories, 'categorized_laws': categorized_laws,
         'side_laws': side_laws, 'search': search, 'selected_category': selected_category, 'detailed_law': detailed_law,
         'comments': comments
     }
-    return render(request, 'pages/law.html', context)
+    return stream_render(request, 'pages/law.html', context)
+
+
+def laws_fragment(request):
+    search = request.GET.get('search')
+    category = request.GET.get('category')
+    laws, next_page = fragment_page(filter_laws(search, category), get_page_number(request), LAWS_PAGE_SIZE)
+    context = {
+        'laws': laws, 'next_page': next_page,
+        'query': urlencode({'category': category or '', 'search': search or ''}),
+    }
+    return render(request, 'includes/laws/list.html', context)
 
 
 @login_required
@@ -597,14 +660,14 @@ def faqs(request):
 def checklists(request):
     categories = Checklist.CATEGORY_CHOICES
     selected_category = request.GET.get('category')
-    side_checklists = Checklist.objects.all().order_by('-valid_from')[:5]
+    side_checklists = Checklist.objects.with_is_new().order_by('-valid_from')[:5]
     search = request.GET.get('search')
     sort = request.GET.get('sort')
 
     if not selected_category and categories:
         selected_category = categories[0][0]
 
-    checklists = Checklist.objects.filter(category=selected_category).order_by('-valid_from')
+    checklists = Checklist.objects.with_is_new().filter(category=selected_category).order_by('-valid_from')
 
     if search:
         checklists = checklists.filter(
@@ -616,6 +679,8 @@ def checklists(request):
         checklists = checklists.order_by(
             '-views'
         )
+    elif sort == 'new':
+        checklists = checklists.new_first()
 
     category_limits = {
         'Обходы по Безопасности': 5,
@@ -673,40 +738,52 @@ def study(request):
     return render(request, 'pages/study.html', context)
 
 
-def webinars_view(request):
-    search = request.GET.get('search')
-    sort = request.GET.get('sort')
-    category_filter = request.GET.get('category', 'all')
-    last_education_webinars = Event.objects.filter(categories__slug__exact='webinar', tags__slug='education')
-
-    all_webinars = Event.objects.filter(categories__slug='webinar')
-
+def filter_webinars(search=None, section=None, sort=None):
+    webinars = Event.objects.filter(categories__slug='webinar').prefetch_related('tags').order_by('-id')
     if search:
-        all_webinars = all_webinars.filter(
+        webinars = webinars.filter(
             Q(title__icontains=search) |
             Q(description__icontains=search)
         )
+    if section == 'live':
+        webinars = webinars.filter(tags__slug='live')
+    if sort == 'popular':
+        webinars = webinars.order_by('-view_count', '-id')
+    return webinars
 
-    live_webinars = all_webinars.filter(tags__slug='live')
-    soon_webinars = all_webinars.order_by('-created_at')[:6]
-
-    if category_filter == 'live':
-        webinars = live_webinars
-    elif category_filter == 'soon':
-        webinars = soon_webinars
-    else:
-        webinars = all_webinars
 
-    if sort == 'popular':
-        webinars = webinars.order_by('-view_count')
+def webinars_view(request):
+    search = request.GET.get('search')
+    sort = request.GET.get('sort')
+    category_filter = request.GET.get('category', 'all')
+    last_education_webinars = Event.objects.filter(
+        categories__slug__exact='webinar', tags__slug='education'
+    ).prefetch_related('tags').order_by('-created_at')[:6]
 
-    if category_filter == 'soon':
-        webinars = webinars[:6]
+    live_webinars, live_next_page = fragment_page(filter_webinars(search, 'live'), 1, WEBINARS_PAGE_SIZE)
+    soon_webinars = filter_webinars(search).order_by('-created_at')[:6]
+    webinars, all_next_page = fragment_page(filter_webinars(search, 'all', sort), 1, WEBINARS_PAGE_SIZE)
 
-    context = {'webinars': webinars,
+    context = {'webinars': webinars, 'all_next_page': all_next_page,
+               'all_query': urlencode({'section': 'all', 'search': search or '', 'sort': sort or ''}),
                'last_education_webinars': last_education_webinars, 'category_filter': category_filter,
-               'live_webinars': live_webinars, 'soon_webinars': soon_webinars}
-    return render(request, 'pages/webinars.html', context)
+               'live_webinars': live_webinars, 'live_next_page': live_next_page,
+               'live_query': urlencode({'section': 'live', 'search': search or ''}),
+               'soon_webinars': soon_webinars}
+    return stream_render(request, 'pages/webinars.html', context)
+
+
+def webinars_fragment(request):
+    search = request.GET.get('search')
+    section = request.GET.get('section')
+    sort = request.GET.get('sort')
+    webinars, next_page = fragment_page(filter_webinars(search, section, sort), get_page_number(request),
+                                        WEBINARS_PAGE_SIZE)
+    context = {
+        'webinars': webinars, 'next_page': next_page,
+        'query': urlencode({'section': section or '', 'search': search or '', 'sort': sort or ''}),
+    }
+    return render(request, 'includes/webinars/list.html', context)
 
 
 RUSSIAN_MONTHS = {
@@ -883,3 +960,46 @@ def tag_detail(request, slug):
     context = {'tag': tag, 'popular_news': popular_news, 'page': page, 'fixed_menu': menu,
                'category_news': category_news}
     return render(request, 'pages/tags.html', context)
+
+
+@never_cache
+@require_safe
+def download_file(request, kind, pk):
+    # Files of published materials are public: the checks are that the kind is
+    # one of ours and the object exists, so only FileFields are reachable.
+    if kind not in DOWNLOADS:
+        raise Http404
+    model, counter, link_field, link_first = DOWNLOADS[kind]
+    obj = get_object_or_404(model.objects.only('pk', 'file', 'file_mime', link_field), pk=pk)
+    link = getattr(obj, link_field)
+    if not link and not obj.file:
+        raise Http404
+
+    if request.method == 'GET':
+        record_download(model, counter, obj.pk)
+    if link and (link_first or not obj.file):
+        return redirect(link)
+    return file_response(obj.file, obj.file_mime)
+
+
+@staff_member_required
+@never_cache
+@require_safe
+def export_data(request, kind):
+    if kind not in EXPORTS:
+        raise Http404
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    filters = form.cleaned_data
+    export_format = filters.pop('format') or 'csv'
+    try:
+        rows = iter_export(kind, export_format, **filters)
+    except ExportError as e:
+        return HttpResponseBadRequest(str(e))
+
+    response = StreamingHttpResponse(rows, content_type=FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{kind}-{date.today():%Y%m%d}.{export_format}"'
+    # Passed on as it is produced instead of being spooled to disk by nginx.
+    response['X-Accel-Buffering'] = 'no'
+    return response
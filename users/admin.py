@@ -1,7 +1,18 @@
 from django.contrib import admin
 
+from config.admin_base import BaseAdmin
 from users.models import UserProfile, EmailVerification
 
-# Register your models here.
-admin.site.register(UserProfile)
-admin.site.register(EmailVerification)
+
+@admin.register(UserProfile)
+class UserProfileAdmin(BaseAdmin):
+    list_display = ('user', 'full_name', 'position')
+    list_select_related = ('user',)
+    search_fields = ('full_name', 'user__username')
+    autocomplete_fields = ('user',)
+
+
+@admin.register(EmailVerification)
+class EmailVerificationAdmin(BaseAdmin):
+    list_display = ('email', 'created_at', 'is_verified')
+    search_fields = ('email__exact',)